@@ -0,0 +1,48 @@
+"""
+Import-time benchmark for the sgf_solver packages.
+
+Runs ``python -X importtime`` in a fresh interpreter for every package and
+prints the cumulative import time together with the slowest dependencies.
+
+    python benchmarks/import_time.py [module ...]
+"""
+import os
+import subprocess
+import sys
+
+MODULES = [
+    'sgf_solver.board',
+    'sgf_solver.board.analysis',
+    'sgf_solver.parser',
+    'sgf_solver.solver',
+    'sgf_solver.model',
+    'sgf_solver.dataset',
+]
+
+base_path = os.path.join(os.path.dirname(__file__), os.path.pardir)
+
+
+def import_times(module: str):
+    """ Return {imported module: cumulative microseconds} for one import """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=base_path, stderr=subprocess.PIPE, universal_newlines=True,
+                            check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+if __name__ == '__main__':
+    for module in sys.argv[1:] or MODULES:
+        times = import_times(module)
+        print(f"{module:<30} {times[module] / 1000:8.1f} ms")
+
+        slowest = sorted(((t, n) for n, t in times.items() if n != module), reverse=True)[:5]
+        for cumulative, name in slowest:
+            print(f"    {name:<26} {cumulative / 1000:8.1f} ms")
@@ -0,0 +1,82 @@
+"""
+Accuracy against CPU inference latency of the network sizes.
+
+For every config of ``MODEL_CONFIGS`` with trained weights, prints the parameter
+count, the value mean squared error and the share of validation problems whose
+most likely move is a correct answer, and the median ``predict_on_batch`` time
+for a single position and for a batch. Train the sizes first, directly or
+distilled from a bigger one:
+
+    python -m sgf_solver.model.train --config tiny --distill medium
+
+    python benchmarks/model_zoo.py [dataset] [--batches N] [--repeat N]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir))
+os.environ['CUDA_VISIBLE_DEVICES'] = ''
+
+import numpy as np  # noqa: E402
+
+from sgf_solver.constants import MODEL_CONFIGS, PREDICT_BATCH, PROBLEM_DATASET  # noqa: E402
+from sgf_solver.model import load_model, weights_path  # noqa: E402
+from sgf_solver.model.dataset import ProblemBatches  # noqa: E402
+
+
+def accuracy(model, batches) -> tuple:
+    """ Value mean squared error and top-1 answer rate over the batches """
+    errors, hits, rows = 0.0, 0, 0
+    for problems, (values, answers) in batches:
+        predicted_values, policies = model.predict_on_batch(problems)
+        errors += float(np.sum((np.asarray(predicted_values) - values) ** 2))
+        best = np.asarray(policies).argmax(axis=1)
+        hits += int(np.count_nonzero(answers[np.arange(len(best)), best]))
+        rows += len(problems)
+
+    return errors / rows, hits / rows
+
+
+def latency(model, problems: np.ndarray, repeat: int) -> float:
+    """ Median seconds of a predict_on_batch call """
+    model.predict_on_batch(problems)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict_on_batch(problems)
+        times.append(time.perf_counter() - start)
+
+    return float(np.median(times))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    options = {'--batches': 20, '--repeat': 50}
+    for name in options:
+        if name in args:
+            index = args.index(name)
+            options[name] = int(args[index + 1])
+            del args[index:index + 2]
+
+    path = args[0] if args else PROBLEM_DATASET.format('small')
+    _, validation = ProblemBatches.split(path, batch_size=PREDICT_BATCH)
+    batches = [batch for _, batch in zip(range(options['--batches']), validation.epoch())]
+    sample = batches[0][0]
+
+    print(f"{'config':>8} {'size':>6} {'params':>9} {'value mse':>10} {'top-1':>7} "
+          f"{'batch 1':>10} {f'batch {len(sample)}':>10} {'rows/s':>8}")
+
+    for config, (channels, blocks) in MODEL_CONFIGS.items():
+        if not os.path.exists(weights_path(config)):
+            print(f"{config:>8} {channels:>3}x{blocks:<2} no weights")
+            continue
+
+        model = load_model(config=config)
+        mse, top1 = accuracy(model, batches)
+        single = latency(model, sample[:1], options['--repeat'])
+        batched = latency(model, sample, options['--repeat'])
+
+        print(f"{config:>8} {channels:>3}x{blocks:<2} {model.count_params():>9} {mse:>10.4f} "
+              f"{top1:>7.3f} {single * 1e3:>8.2f}ms {batched * 1e3:>8.2f}ms "
+              f"{len(sample) / batched:>8.0f}")
@@ -0,0 +1,62 @@
+"""
+SGF parsing benchmark on the problem corpus.
+
+Reads every SGF file under the given directory (the problem path by default)
+and prints the time spent by ``SGFParser.parse`` over a few repeats, and the
+memory held by the parsed collections.
+
+    python benchmarks/sgf_parse.py [directory] [--repeat N]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir))
+
+from sgf_solver.constants import PROBLEM_PATH  # noqa: E402
+from sgf_solver.dataset.builder import find_sgf_files  # noqa: E402
+from sgf_solver.parser.sgflib import SGFParser  # noqa: E402
+
+
+def parse_times(data, repeat: int = 3):
+    """ Return the seconds spent parsing all data, once per repeat """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for sgf_data in data:
+            SGFParser(sgf_data).parse()
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def parse_memory(data) -> int:
+    """ Return the bytes allocated by the collections of all data """
+    tracemalloc.start()
+    collections = [SGFParser(sgf_data).parse() for sgf_data in data]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del collections
+    return size
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    repeat = 3
+    if '--repeat' in args:
+        index = args.index('--repeat')
+        repeat = int(args[index + 1])
+        del args[index:index + 2]
+
+    data = []
+    for path in find_sgf_files(args[0] if args else PROBLEM_PATH):
+        with open(path) as file:
+            data.append(file.read())
+
+    size = sum(len(sgf_data) for sgf_data in data) / 2 ** 20
+    best = min(parse_times(data, repeat))
+    print(f"{len(data)} files, {size:.1f} MB: {best:.3f} s, "
+          f"{len(data) / best:.0f} files/s, {size / best:.1f} MB/s, "
+          f"parsed: {parse_memory(data) / 2 ** 20:.1f} MB")
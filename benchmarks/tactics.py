@@ -0,0 +1,100 @@
+"""
+Share of network evaluations saved by the tactical reader.
+
+Searches the first problems of the dataset, or the problems of a directory of
+SGF files, with the trained model and counts, over the final trees, the leaves
+decided by reading (``TsumegoBoard.solved`` undecided, ``read_targets``
+conclusive) against the ``predict`` calls made. With ``--uniform`` a model with
+uniform priors and a neutral value stands in for the network, so no weights are
+needed.
+
+    python benchmarks/tactics.py [count | directory] [--rollouts N] [--uniform]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.path.pardir))
+
+from sgf_solver.board import TsumegoBoard  # noqa: E402
+from sgf_solver.solver import Node, TreeSearch  # noqa: E402
+
+
+class UniformModel:
+    def predict(self, data):
+        count = len(data)
+        return np.full((count, 1), 0.5), np.full((count, 361), 1 / 361)
+
+
+class CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def predict(self, data):
+        self.calls += 1
+        return self.model.predict(data)
+
+
+def dataset_boards(count: int):
+    from sgf_solver.dataset import ProblemStore
+
+    with ProblemStore() as store:
+        for row in range(count):
+            yield store.board(row)
+
+
+def sgf_boards(directory: str):
+    from sgf_solver.dataset.builder import find_sgf_files
+    from sgf_solver.parser import TsumegoParser
+
+    for path in find_sgf_files(directory):
+        yield TsumegoBoard(board=TsumegoParser(path).position)
+
+
+def read_leaves(root: Node) -> int:
+    """ Nodes of the tree decided by the reader only """
+    count, unexplored = 0, [root]
+    while unexplored:
+        node = unexplored.pop()
+        unexplored.extend(node._children.values())
+        count += node.outcome() is not None and node.board.solved() is None
+
+    return count
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    rollouts = 200
+    if '--rollouts' in args:
+        index = args.index('--rollouts')
+        rollouts = int(args[index + 1])
+        del args[index:index + 2]
+
+    if '--uniform' in args:
+        args.remove('--uniform')
+        model = CountingModel(UniformModel())
+    else:
+        from sgf_solver.model import load_model
+        model = CountingModel(load_model())
+
+    if args and os.path.isdir(args[0]):
+        boards = sgf_boards(args[0])
+    else:
+        boards = dataset_boards(int(args[0]) if args else 100)
+
+    tree = TreeSearch(model, verbose=False)
+    count, read, start = 0, 0, time.perf_counter()
+
+    for board in boards:
+        root = Node(board)
+        tree.rollout(root, rollouts)
+        read += read_leaves(root)
+        count += 1
+
+    elapsed = time.perf_counter() - start
+    print(f"{count} problems, {rollouts} rollouts: {elapsed:.1f} s, "
+          f"{model.calls} evaluations, {read} leaves read, "
+          f"{read / max(read + model.calls, 1):.1%} of evaluations avoided")
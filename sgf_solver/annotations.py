@@ -18,3 +18,5 @@ NodeListType = List['Node']
 CollectionType = List[NodeListType]
 DataCollectionType = Tuple[List[list], List[int], List[ndarray]]
 DatasetType = Tuple[ndarray, ndarray, ndarray]
+SampleType = Tuple[ndarray, int, ndarray]
+VariationType = List[Tuple[ndarray, CoordType]]
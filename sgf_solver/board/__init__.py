@@ -1,2 +1,3 @@
+from sgf_solver.constants import BOARD_SHAPE
 from .board import GoBoard
 from .tsumego import TsumegoBoard
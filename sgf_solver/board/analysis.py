@@ -3,8 +3,106 @@ from itertools import product
 import numpy as np
 
 from sgf_solver.board import GoBoard
+from sgf_solver.board.tsumego import classify_problems
+from sgf_solver.constants import BOARD_SHAPE
 from sgf_solver.enums import Location
-from utils import get_problems
+
+
+def label_components(masks: np.ndarray) -> np.ndarray:
+    """ Connected components of (N, 19, 19) masks
+
+    Every point gets the label of the smallest point of its component (1 + flat index),
+    points outside the masks get 0. The horizontal runs of all boards are joined along
+    their vertical contacts with a vectorized union-find: every round hooks the larger
+    root of each contact to the smaller one and compresses the paths.
+    """
+    masks = np.asarray(masks, dtype=bool).reshape((-1, *BOARD_SHAPE))
+    starts = masks.copy()
+    starts[:, :, 1:] &= ~masks[:, :, :-1]
+
+    runs = np.cumsum(starts.ravel()) - 1
+    run_starts = np.flatnonzero(starts.ravel())
+
+    # contacts between a point and the point below it, once per pair of runs
+    touching = masks[:, :-1] & masks[:, 1:]
+    touching[:, :, 1:] &= ~touching[:, :, :-1]
+    above = np.flatnonzero(touching.ravel())
+    above += above // (18 * 19) * 19
+    contacts = np.stack([runs[above], runs[above + 19]])
+
+    parent = np.arange(len(run_starts))
+    while contacts.size:
+        roots = parent[contacts]
+        low, high = roots.min(axis=0), roots.max(axis=0)
+        if np.array_equal(low, high):
+            break
+
+        np.minimum.at(parent, high, low)
+        while True:
+            compressed = parent[parent]
+            if np.array_equal(compressed, parent):
+                break
+            parent = compressed
+
+    labels = np.zeros(masks.shape, dtype=np.int32)
+    labels[masks] = run_starts[parent[runs[masks.ravel()]]] % 361 + 1
+    return labels
+
+
+def filled_regions(groups: np.ndarray) -> np.ndarray:
+    """ Points of (N, 19, 19) stone masks enclosed from all four directions
+
+    Board edges touched by the stones of a board count as enclosing, as in
+    GroupAnalyzer.get_filled_region.
+    """
+    groups = np.asarray(groups, dtype=bool).reshape((-1, *BOARD_SHAPE))
+    padded = np.pad(groups, [(0, 0), (1, 1), (1, 1)])
+    padded[:, 0, :] = groups[:, 0, :].any(axis=1)[:, np.newaxis]
+    padded[:, -1, :] = groups[:, -1, :].any(axis=1)[:, np.newaxis]
+    padded[:, :, 0] |= groups[:, :, 0].any(axis=1)[:, np.newaxis]
+    padded[:, :, -1] |= groups[:, :, -1].any(axis=1)[:, np.newaxis]
+
+    filled = np.logical_or.accumulate(padded, 1) & \
+             np.logical_or.accumulate(padded, 2) & \
+             np.logical_or.accumulate(padded[:, ::-1, :], 1)[:, ::-1, :] & \
+             np.logical_or.accumulate(padded[:, :, ::-1], 2)[:, :, ::-1]
+
+    return filled[:, 1:-1, 1:-1]
+
+
+def _interiors(regions: np.ndarray, filled: np.ndarray) -> np.ndarray:
+    """ Points of the labelled regions lying completely inside the filled area """
+    keys = np.arange(len(regions))[:, np.newaxis, np.newaxis] * 363 + regions
+    sizes = np.bincount(keys.ravel(), minlength=len(regions) * 363)
+    inside = np.bincount(keys[filled], minlength=len(regions) * 363)
+
+    enclosed = sizes == inside
+    return (regions > 0) & enclosed[keys]
+
+
+class BatchAnalysis:
+    """
+    Group analysis of a stack of positions. Attributes, all (N, 19, 19) unless noted:
+      - groups[color]: labels of the connected stones of a color
+      - regions[color]: labels of the connected areas not occupied by a color
+      - interiors[color]: points of the regions enclosed by the stones of a color
+      - live: (N,) whether black has to live, as classified for TsumegoBoard
+    """
+
+    def __init__(self, positions: np.ndarray):
+        positions = np.asarray(positions).reshape((-1, *BOARD_SHAPE))
+
+        self.groups, self.regions, self.interiors = {}, {}, {}
+        for color in (Location.BLACK, Location.WHITE):
+            stones = positions == color
+            self.groups[color] = label_components(stones)
+            self.regions[color] = label_components(~stones)
+            self.interiors[color] = _interiors(self.regions[color], filled_regions(stones))
+
+        self.live = classify_problems(positions)
+
+    def __len__(self):
+        return len(self.live)
 
 
 class GroupStatus:
@@ -71,8 +169,17 @@ class GroupAnalyzer(GoBoard):
 
         return interiors
 
+    def batch_interiors(self, loc: Location):
+        """ Same regions as get_interiors from the vectorized BatchAnalysis """
+        analysis = BatchAnalysis(self._board)
+        labels = analysis.regions[loc][0] * analysis.interiors[loc][0]
+
+        return [set(zip(*np.nonzero(labels == label))) for label in np.unique(labels[labels > 0])]
+
 
 if __name__ == '__main__':
+    from utils import get_problems
+
     problems = get_problems(True)
 
     prob = np.array([
@@ -1,5 +1,5 @@
 from itertools import product
-from typing import Set
+from typing import TYPE_CHECKING, Iterable, Set
 
 import numpy as np
 
@@ -17,6 +17,11 @@ from sgf_solver.constants import BOARD_SHAPE
 from sgf_solver.enums import Location
 from sgf_solver.exceptions import CoordinateError, IllegalMoveError
 
+if TYPE_CHECKING:
+    from sgf_solver.model.patterns import PatternCodes
+
+ALL_COORDS = tuple(product(range(19), range(19)))
+
 
 class GoBoard:
     def __init__(self, board: PositionType,
@@ -28,6 +33,7 @@ class GoBoard:
         self._score = score or {Location.BLACK: 0, Location.WHITE: 0}
         self._history = history.copy() if history else []
         self._illegal = set()
+        self._patterns = None
 
     def __repr__(self):
         return f"GoBoard: {len(self._history)} moves, {self.turn_color} to play"
@@ -102,8 +108,24 @@ class GoBoard:
 
     def _pop_history(self) -> None:
         """ Load previous board position """
+        board = self._board
         self._board, self._turn, self._score = self._history.pop()
 
+        if self._patterns is not None:
+            self._patterns.sync(board, self._board)
+
+    def patterns(self, diamond: bool = False) -> 'PatternCodes':
+        """ Pattern codes of the position, kept up to date by the following moves """
+        if self._patterns is None or self._patterns.diamond != diamond:
+            from sgf_solver.model.patterns import PatternCodes
+            self._patterns = PatternCodes(self._board, diamond)
+
+        return self._patterns
+
+    def _coords(self) -> Iterable[CoordType]:
+        """ Coordinates scanned when looking for groups and areas """
+        return ALL_COORDS
+
     def _get_loc(self, coord: CoordType) -> Location:
         """ Get location of coordinate """
         if not all([0 <= xy < 19 for xy in coord]):
@@ -178,20 +200,16 @@ class GoBoard:
         return liberties
 
     def _get_one_point_area(self) -> Set[CoordType]:
-        unexplored = np.array(self._board == Location.EMPTY)
-        moves = set()
+        """ Empty points without empty neighbours over the whole board
 
-        for coord in product(range(19), range(19)):
-
-            if unexplored[coord]:
-                area = self._get_area(coord)
-
-                if len(area) == 1:
-                    moves |= area
-
-                unexplored[tuple(zip(*area))] = False
+        Not limited to _coords: the legal moves plane fed to the network has to mark
+        the same suicides as the whole-board positions of the training samples.
+        """
+        occupied = np.pad(self._board != Location.EMPTY, 1, constant_values=True)
+        single = (self._board == Location.EMPTY) & \
+                 occupied[:-2, 1:-1] & occupied[2:, 1:-1] & occupied[1:-1, :-2] & occupied[1:-1, 2:]
 
-        return moves
+        return {(int(x), int(y)) for x, y in zip(*np.nonzero(single))}
 
     def _kill_group(self, group: ChainType) -> int:
         liberties = self._get_liberties(group)
@@ -254,6 +272,10 @@ class GoBoard:
         self._board[coord] = self._turn
         captured = self._capture(coord)
 
+        # before the checks, an illegal move is taken back through _pop_history
+        if self._patterns is not None:
+            self._patterns.sync(self._history[-1][0], self._board)
+
         if captured:
             self._add_score(captured)
         else:
@@ -269,6 +291,11 @@ class GoBoard:
         self._push_history()
         self._flip_turn()
 
+    def undo(self):
+        """ Take back the last move or pass """
+        self._pop_history()
+        self._set_illegal()
+
     @property
     def legal_moves(self):
         legal_moves = np.ones(BOARD_SHAPE, dtype=int)
@@ -0,0 +1,271 @@
+"""
+Status of small enclosed eye spaces.
+
+An eye space here is a connected empty area of at most EYE_SIZE points that is
+all the liberties of a single chain. Nothing but the chain touches it, so its
+status only depends on its shape: the table is keyed by the shape in its
+canonical symmetry and tells whether the chain lives with the defender to move
+and with the attacker to move, and which first moves decide an unsettled shape
+(the vital points).
+
+The table is generated offline by reading every shape out on a TsumegoBoard,
+with the life and capture rules of ``TsumegoBoard.solved``, and loaded once on
+first lookup:
+
+    python -m sgf_solver.board.eyes
+"""
+import os
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from sgf_solver.annotations import CoordType
+from sgf_solver.constants import EYE_SIZE, EYE_TABLE
+from sgf_solver.enums import Location
+from sgf_solver.exceptions import IllegalMoveError
+from sgf_solver.storage import read_arrays, write_arrays
+
+TABLE_VERSION = 1
+# empty lines between the attacker wall of a generated shape and the board edge
+SHAPE_OFFSET = 3
+
+ShapeType = FrozenSet[CoordType]
+
+
+class EyeShape(NamedTuple):
+    defender_lives: bool
+    attacker_kills: bool
+    vital: Tuple[CoordType, ...]
+
+    def lives(self, defender_to_move: bool) -> bool:
+        return self.defender_lives if defender_to_move else not self.attacker_kills
+
+
+def _forms(window: np.ndarray) -> List[np.ndarray]:
+    flips = [window, np.flip(window, 0), np.flip(window, 1), np.flip(window, (0, 1))]
+    return flips + [np.transpose(flip) for flip in flips]
+
+
+def _window(space: Iterable[CoordType]) -> Tuple[np.ndarray, CoordType]:
+    xs, ys = (np.array(axis) for axis in zip(*space))
+    window = np.zeros((xs.max() - xs.min() + 1, ys.max() - ys.min() + 1), dtype=bool)
+    window[xs - xs.min(), ys - ys.min()] = True
+    return window, (int(xs.min()), int(ys.min()))
+
+
+def _key(form: np.ndarray) -> bytes:
+    return bytes(form.shape) + np.packbits(form).tobytes()
+
+
+def canonical_shape(space: Iterable[CoordType]) -> Tuple[bytes, np.ndarray]:
+    """ Key of the shape and, for every cell of the canonical form, the original flat index
+
+    Points of the canonical form map back to the board at origin + divmod(index, columns).
+    """
+    window, _ = _window(space)
+    indices = np.arange(window.size).reshape(window.shape)
+    forms = list(zip(_forms(window), _forms(indices)))
+
+    form, form_indices = min(forms, key=lambda pair: _key(pair[0]))
+    return _key(form), form_indices
+
+
+@lru_cache(maxsize=None)
+def _table() -> Dict[bytes, Tuple[bool, bool, np.ndarray]]:
+    table = {}
+    if not os.path.exists(EYE_TABLE):
+        return table
+
+    arrays, _ = read_arrays(EYE_TABLE, mmap=False)
+
+    for shape, cells, status, vital in zip(arrays['shapes'], arrays['cells'], arrays['status'],
+                                           arrays['vital']):
+        size = shape[0] * shape[1]
+        form = cells[:size].reshape(shape)
+        table[_key(form)] = (bool(status[0]), bool(status[1]), vital[:size].reshape(shape))
+
+    return table
+
+
+def eye_shape(space: Iterable[CoordType]) -> Optional[EyeShape]:
+    """ Status of an eye space in board coordinates, None for shapes not in the table """
+    space = list(space)
+    if not space or len(space) > EYE_SIZE:
+        return None
+
+    key, form_indices = canonical_shape(space)
+    entry = _table().get(key)
+    if entry is None:
+        return None
+
+    defender_lives, attacker_kills, vital = entry
+    window, (x0, y0) = _window(space)
+    vital_points = tuple(sorted((x0 + x, y0 + y) for x, y in
+                                (divmod(int(idx), window.shape[1]) for idx in form_indices[vital])))
+
+    return EyeShape(defender_lives, attacker_kills, vital_points)
+
+
+def free_shapes(max_size: int = EYE_SIZE) -> List[ShapeType]:
+    """ Connected shapes up to max_size points, one per symmetry class """
+    shapes, keys = [], set()
+    level = {frozenset([(0, 0)])}
+
+    for _ in range(max_size):
+        grown = set()
+        for shape in level:
+            key, _ = canonical_shape(shape)
+            if key in keys:
+                continue
+
+            keys.add(key)
+            shapes.append(shape)
+            for x, y in shape:
+                for near in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                    if near not in shape:
+                        grown.add(shape | {near})
+
+        # keep one translation of every grown shape
+        level = set()
+        for shape in grown:
+            x0, y0 = min(x for x, _ in shape), min(y for _, y in shape)
+            level.add(frozenset((x - x0, y - y0) for x, y in shape))
+
+    return shapes
+
+
+def _ring(shape: Set[CoordType], distance: int) -> np.ndarray:
+    near = np.zeros((19, 19), dtype=bool)
+    for x, y in shape:
+        near[x - distance:x + distance + 1, y - distance:y + distance + 1] = True
+    return near
+
+
+def _read(board, space: List[CoordType], passes: int, depth: int, memo: dict) -> Optional[bool]:
+    """ Whether the defender (black) lives, None if undecided within depth """
+    solved = board.solved(eyes=False)
+    if solved is not None:
+        return solved
+    if passes == 2 or depth == 0:
+        return None
+
+    key = (board._board.tobytes(), board.turn, passes, depth)
+    if key in memo:
+        return memo[key]
+
+    defender = board.turn == Location.BLACK
+    win, loss = (True, False) if defender else (False, True)
+    results = set()
+
+    for coord in space + [None]:
+        try:
+            if coord is None:
+                board.make_pass()
+            else:
+                board.move(coord, False)
+        except IllegalMoveError:
+            continue
+
+        results.add(_read(board, space, passes + 1 if coord is None else 0, depth - 1, memo))
+        board._pop_history()
+
+        if win in results:
+            break
+
+    result = win if win in results else None if None in results or not results else loss
+    memo[key] = result
+    return result
+
+
+def read_shape(shape: ShapeType) -> Optional[Tuple[bool, bool, Set[CoordType]]]:
+    """ (lives with the defender to move, dies with the attacker to move, vital points)
+
+    The shape is read enclosed by a black chain that is surrounded by a white wall,
+    None when the enclosing stones do not form one chain or reading is inconclusive.
+    """
+    from sgf_solver.board.tsumego import TsumegoBoard
+    from sgf_solver.enums import ProblemClass
+
+    space = sorted((x + SHAPE_OFFSET, y + SHAPE_OFFSET) for x, y in shape)
+    inside = np.zeros((19, 19), dtype=bool)
+    inside[tuple(zip(*space))] = True
+
+    chain = _ring(space, 1) & ~inside
+    position = np.where(chain, Location.BLACK, np.where(_ring(space, 2) & ~_ring(space, 1),
+                                                       Location.WHITE, Location.EMPTY))
+
+    outcomes, vital = [], None
+    for turn in (Location.BLACK, Location.WHITE):
+        board = TsumegoBoard(ProblemClass.LIVE, chain.astype(int), board=position, turn=turn)
+        if len(board._get_group(tuple(np.argwhere(chain)[0]))) != np.count_nonzero(chain):
+            return None
+
+        memo, depth = {}, 6 * len(space) + 4
+        lives = _read(board, space, 0, depth, memo)
+        if lives is None:
+            return None
+
+        winning = set()
+        for coord in space:
+            try:
+                board.move(coord, False)
+            except IllegalMoveError:
+                continue
+
+            if _read(board, space, 0, depth - 1, memo) == (turn == Location.BLACK):
+                winning.add(coord)
+            board._pop_history()
+
+        outcomes.append(lives)
+        vital = winning if vital is None else vital & winning
+
+    defender_lives, attacker_lives = outcomes
+    vital = {(x - SHAPE_OFFSET, y - SHAPE_OFFSET) for x, y in vital}
+    return defender_lives, not attacker_lives, vital if defender_lives != attacker_lives else set()
+
+
+def generate_table(path: str = EYE_TABLE, max_size: int = EYE_SIZE) -> int:
+    """ Read all shapes up to max_size points and write the table, returns its size """
+    side = max_size
+    shapes, cells, status, vital = [], [], [], []
+
+    for shape in free_shapes(max_size):
+        read = read_shape(shape)
+        if read is None:
+            continue
+
+        defender_lives, attacker_kills, vital_points = read
+        _, form_indices = canonical_shape(shape)
+        window, _ = _window(shape)
+        vital_window = np.zeros(window.shape, dtype=bool)
+        for x, y in vital_points:
+            vital_window[x, y] = True
+
+        form = window.ravel()[form_indices]
+        padded = np.zeros((2, side * side), dtype=bool)
+        padded[0, :form.size] = form.ravel()
+        padded[1, :form.size] = vital_window.ravel()[form_indices].ravel()
+
+        shapes.append(form.shape)
+        cells.append(padded[0])
+        vital.append(padded[1])
+        status.append((defender_lives, attacker_kills))
+
+    write_arrays(path, {
+        'shapes': np.array(shapes, dtype=np.int8).reshape((-1, 2)),
+        'cells': np.array(cells, dtype=bool).reshape((-1, side * side)),
+        'status': np.array(status, dtype=bool).reshape((-1, 2)),
+        'vital': np.array(vital, dtype=bool).reshape((-1, side * side)),
+    }, {'version': TABLE_VERSION, 'max_size': max_size})
+
+    _table.cache_clear()
+    return len(shapes)
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    count = generate_table()
+    print(f"{count} shapes up to {EYE_SIZE} points in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,139 @@
+"""
+Board for random playouts, with make/unmake.
+
+Points live in a flat list with a border of EDGE cells, so neighbours are plain
+index offsets. Every change is recorded in an undo log: ``mark`` returns the log
+position and ``undo`` restores the board to it, so many playouts run from one
+position without copying. Only simple ko is checked, superko is left to GoBoard.
+With pattern codes, every cell change and its undo is applied to them as well.
+"""
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+import numpy as np
+
+from sgf_solver.annotations import CoordType
+from sgf_solver.enums import Location
+
+if TYPE_CHECKING:
+    from sgf_solver.model.patterns import PatternCodes
+
+SIZE = 19
+STRIDE = SIZE + 2
+EDGE = 2
+DIRECTIONS = (-STRIDE, 1, STRIDE, -1)
+
+
+def point(coord: CoordType) -> int:
+    return (coord[0] + 1) * STRIDE + coord[1] + 1
+
+
+def coord_of(idx: int) -> CoordType:
+    x, y = divmod(idx, STRIDE)
+    return x - 1, y - 1
+
+
+class FastBoard:
+
+    def __init__(self, position: np.ndarray, turn: Location = Location.BLACK,
+                 ko: CoordType = None, patterns: 'PatternCodes' = None):
+        """ ko is the point the side to move may not retake, patterns the codes of position """
+        cells = np.full((STRIDE, STRIDE), EDGE, dtype=int)
+        cells[1:-1, 1:-1] = position
+        self.cells: List[int] = cells.ravel().tolist()
+        self.turn = int(turn)
+        self.ko: Optional[int] = None if ko is None else point(ko)
+        self.patterns = patterns
+        # (idx, old value) changes, with (-1, old turn) and (-2, old ko) entries
+        self._log = []
+
+    def mark(self) -> int:
+        return len(self._log)
+
+    def undo(self, mark: int):
+        log, cells = self._log, self.cells
+        while len(log) > mark:
+            idx, value = log.pop()
+            if idx == -1:
+                self.turn = value
+            elif idx == -2:
+                self.ko = value
+            else:
+                cells[idx] = value
+                if self.patterns is not None:
+                    self.patterns.set(coord_of(idx), value)
+
+    def _set(self, idx: int, value: int):
+        self._log.append((idx, self.cells[idx]))
+        self.cells[idx] = value
+        if self.patterns is not None:
+            self.patterns.set(coord_of(idx), value)
+
+    def _chain_liberty(self, idx: int, stones: list) -> bool:
+        """ Fill stones with the chain at idx, stop at its first liberty """
+        cells = self.cells
+        color = cells[idx]
+        seen = {idx}
+        stones.append(idx)
+
+        for stone in stones:
+            for direction in DIRECTIONS:
+                near = stone + direction
+                value = cells[near]
+                if value == 0:
+                    return True
+                if value == color and near not in seen:
+                    seen.add(near)
+                    stones.append(near)
+
+        return False
+
+    def is_eye(self, idx: int, color: int) -> bool:
+        """ Empty point whose neighbours are all stones of color or the edge """
+        cells = self.cells
+        return all(cells[idx + direction] in (color, EDGE) for direction in DIRECTIONS)
+
+    def play(self, idx: int) -> bool:
+        """ Play for the side to move, False and nothing changed if illegal """
+        cells, color = self.cells, self.turn
+        if cells[idx] != 0 or idx == self.ko:
+            return False
+
+        mark = self.mark()
+        self._set(idx, color)
+
+        captured = []
+        for direction in DIRECTIONS:
+            near = idx + direction
+            if cells[near] == -color:
+                stones = []
+                if not self._chain_liberty(near, stones):
+                    for stone in stones:
+                        self._set(stone, 0)
+                    captured.extend(stones)
+
+        if not captured and not self._chain_liberty(idx, []):
+            self.undo(mark)
+            return False
+
+        self._log.append((-2, self.ko))
+        # a lone stone that took one stone and has only that point as liberty
+        around = [cells[idx + direction] for direction in DIRECTIONS]
+        single = len(captured) == 1 and color not in around and around.count(0) == 1
+        self.ko = captured[0] if single else None
+
+        self._log.append((-1, color))
+        self.turn = -color
+        return True
+
+    def make_pass(self):
+        self._log.append((-2, self.ko))
+        self._log.append((-1, self.turn))
+        self.ko = None
+        self.turn = -self.turn
+
+    def count(self, points: Sequence[int], color: int) -> int:
+        cells = self.cells
+        return sum(cells[idx] == color for idx in points)
+
+    def position(self) -> np.ndarray:
+        return np.array(self.cells).reshape((STRIDE, STRIDE))[1:-1, 1:-1].copy()
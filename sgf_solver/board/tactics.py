@@ -0,0 +1,161 @@
+"""
+Tactical reading of the target stones.
+
+A short forced capture search on a plain ``GoBoard`` copy: the attacker plays
+ataris and, at the first move, nets on the liberties of the target chain; the
+defender extends, captures attacker chains in atari around it and counters
+nets with ataris of its own. A capture is only reported when every defence
+fails within the depth, anything else (three or more liberties, depth exhausted,
+a ko on the way) is left to the search. Defences away from the chain, such as
+ladder breakers, are not read, the local fights of tsumego rarely leave room
+for them.
+"""
+from typing import Iterator, Optional
+
+import numpy as np
+
+from sgf_solver.annotations import ChainType, CoordType
+from sgf_solver.board import GoBoard
+from sgf_solver.board.tsumego import TsumegoBoard
+from sgf_solver.constants import TACTICS_DEPTH
+from sgf_solver.enums import Location, ProblemClass
+from sgf_solver.exceptions import IllegalMoveError
+
+
+class TacticalReader:
+
+    def __init__(self, board: GoBoard, depth: int = TACTICS_DEPTH):
+        # illegal moves of the position are not tracked, GoBoard.move still checks them
+        self._board = GoBoard(board.board, board.turn, history=board.history)
+        self.depth = depth
+        self.reads = 0
+
+    def _play(self, coord: CoordType) -> Optional[str]:
+        """ Play a move, returns why it is illegal or None """
+        try:
+            self._board.move(coord, False)
+        except IllegalMoveError as error:
+            return str(error)
+
+        self.reads += 1
+        return None
+
+    def _undo(self):
+        self._board._pop_history()
+
+    def _chain(self, coord: CoordType) -> Optional[ChainType]:
+        """ Chain at coord, None once it was captured """
+        if self._board._get_loc(coord) is Location.EMPTY:
+            return None
+
+        return self._board._get_group(coord)
+
+    def _adjacent_chains(self, chain: ChainType, loc: Location) -> Iterator[ChainType]:
+        seen = set()
+        for coord in sorted(self._board._get_chain_adjacent(loc, chain)):
+            if coord not in seen and self._board._get_loc(coord) == -loc:
+                enemy = self._board._get_group(coord)
+                seen |= enemy
+                yield enemy
+
+    def captures(self, coord: CoordType, depth: int = None, nets: bool = True) -> bool:
+        """ Whether the attacker, to move, captures the chain at coord """
+        chain = self._chain(coord)
+        if chain is None:
+            return True
+
+        depth = self.depth if depth is None else depth
+        liberties = self._board._get_liberties(chain)
+        if len(liberties) == 1:
+            # the capture itself can be a ko retake
+            if self._play(next(iter(liberties))):
+                return False
+
+            self._undo()
+            return True
+        if len(liberties) > 2 or depth <= 0:
+            return False
+
+        moves = sorted(liberties)
+        if nets:
+            moves += sorted({near for liberty in liberties
+                             for loc, near in self._board._get_adjacent(liberty)
+                             if loc is Location.EMPTY and near not in liberties})
+
+        for move in moves:
+            if self._play(move):
+                continue
+
+            captured = not self.escapes(coord, depth - 1)
+            self._undo()
+
+            if captured:
+                return True
+
+        return False
+
+    def escapes(self, coord: CoordType, depth: int) -> bool:
+        """ Whether the defender, to move, saves the chain at coord """
+        chain = self._chain(coord)
+        if chain is None:
+            return False
+
+        loc = self._board._get_loc(coord)
+        liberties = self._board._get_liberties(chain)
+        if len(liberties) > 2:
+            return True
+
+        moves = set(liberties)
+        for enemy in self._adjacent_chains(chain, loc):
+            enemy_liberties = self._board._get_liberties(enemy)
+            if len(enemy_liberties) == 1 or len(liberties) == 2 and len(enemy_liberties) == 2:
+                moves |= enemy_liberties
+
+        for move in sorted(moves):
+            illegal = self._play(move)
+            if illegal == 'Ko':
+                # kos are not read
+                return True
+            if illegal:
+                continue
+
+            captured = self.captures(coord, depth, nets=False)
+            self._undo()
+
+            if not captured:
+                return True
+
+        return False
+
+
+def read_targets(board: TsumegoBoard, depth: int = TACTICS_DEPTH) -> Optional[bool]:
+    """ Whether black solves the problem, in the convention of TsumegoBoard.solved
+
+    Only decides positions where the remaining target stones form a single chain
+    that is captured by force, None otherwise.
+    """
+    if depth <= 0:
+        return None
+
+    defender = Location.BLACK if board.problem == ProblemClass.LIVE else Location.WHITE
+    targets = list(zip(*np.nonzero((board.board == defender) & (board.stones != 0))))
+    if not targets:
+        return None
+
+    chain = board._get_group(targets[0])
+    if not chain.issuperset(targets):
+        return None
+
+    reader = TacticalReader(board, depth)
+    if board.turn != defender:
+        captured = reader.captures(targets[0])
+    elif len(board._get_liberties(chain)) == 1:
+        # with more liberties any quiet move of the defender could be the answer
+        captured = not reader.escapes(targets[0], depth)
+    else:
+        return None
+
+    if not captured:
+        return None
+
+    return board.problem == ProblemClass.KILL
@@ -1,18 +1,91 @@
-from itertools import product
-from typing import Tuple, Set, Optional
+from typing import Tuple, Set, Optional, List
 
 import numpy as np
 
-from sgf_solver.annotations import ChainType, CoordType
+from sgf_solver.annotations import ChainType, CoordType, PositionType
 from sgf_solver.board import GoBoard
+from sgf_solver.board.eyes import eye_shape
+from sgf_solver.constants import BOARD_SHAPE, EYE_SIZE, REGION_MARGIN, FRAME_WALL
 from sgf_solver.enums import Location, ProblemClass
 
 
+def _bounds(mask: np.ndarray) -> Tuple[int, int, int, int]:
+    xs, ys = np.nonzero(mask)
+    return xs.min(), xs.max(), ys.min(), ys.max()
+
+
+def get_region(position: PositionType, margin: int = REGION_MARGIN) -> np.ndarray:
+    """ Bounding box of the stones grown by margin, snapped to nearby board edges """
+    region = np.zeros(BOARD_SHAPE, dtype=bool)
+
+    if not np.count_nonzero(position):
+        region[:] = True
+        return region
+
+    x0, x1, y0, y1 = _bounds(position)
+    x0, y0 = [0 if low - margin <= margin else low - margin for low in (x0, y0)]
+    x1, y1 = [18 if high + margin >= 18 - margin else high + margin for high in (x1, y1)]
+
+    region[x0:x1 + 1, y0:y1 + 1] = True
+    return region
+
+
+def get_frame(region: np.ndarray, defender: Location, wall: int = FRAME_WALL) -> PositionType:
+    """ Tsumego frame for the area outside the region
+
+    One empty line separates the region from an attacker wall, the rest of the board
+    is filled with defender stones that have enough eyes to stay alive.
+    """
+    x0, x1, y0, y1 = _bounds(region)
+    lines = np.arange(19)
+
+    dx = np.maximum(np.maximum(x0 - lines, lines - x1), 0)
+    dy = np.maximum(np.maximum(y0 - lines, lines - y1), 0)
+    distance = np.maximum.outer(dx, dy)
+
+    eyes = np.logical_and.outer(lines % 3 == 1, lines % 3 == 1)
+
+    frame = np.zeros(BOARD_SHAPE, dtype=int)
+    frame[(distance > 1) & (distance <= 1 + wall)] = -defender
+    frame[(distance > 1 + wall) & ~eyes] = defender
+    return frame
+
+
+def classify_problems(positions: np.ndarray) -> np.ndarray:
+    """ Whether black has to live in each of (N, 19, 19) positions
+
+    Black lives if its stones are on average nearer to the board edges than the white
+    ones, a position missing either color is a kill problem.
+    """
+    positions = np.asarray(positions).reshape((-1, *BOARD_SHAPE))
+    distance = np.add.outer(np.abs(10 - np.arange(19)), np.abs(10 - np.arange(19)))
+
+    counts, totals = [], []
+    for color in (Location.BLACK, Location.WHITE):
+        stones = positions == color
+        counts.append(np.count_nonzero(stones, axis=(1, 2)).astype(np.int64))
+        totals.append(np.sum(stones * distance, axis=(1, 2), dtype=np.int64))
+
+    # average distances from the center compared without division
+    (black, white), (black_total, white_total) = counts, totals
+    return (black > 0) & (white > 0) & (black_total * white > white_total * black)
+
+
+def target_stones(positions: np.ndarray, live: np.ndarray) -> np.ndarray:
+    """ Masks of the stones to save in live problems or to kill in kill problems """
+    positions = np.asarray(positions).reshape((-1, *BOARD_SHAPE))
+    targets = np.where(np.reshape(live, (-1, 1, 1)), Location.BLACK, Location.WHITE)
+    return positions == targets
+
+
 class TsumegoBoard(GoBoard):
-    def __init__(self, problem: ProblemClass = None, stones: np.ndarray = None, **kwargs):
+    def __init__(self, problem: ProblemClass = None, stones: np.ndarray = None,
+                 region: np.ndarray = None, **kwargs):
         super().__init__(**kwargs)
         self._problem = problem
         self._stones = stones
+        self._region = region
+        self._region_coords = None
 
     def __hash__(self):
         return hash(str(self._board) + str(self.legal_moves))
@@ -20,63 +93,103 @@ class TsumegoBoard(GoBoard):
     @property
     def problem(self):
         if self._problem is None:
-            bx, by = np.where(self.board == Location.BLACK)
-            wx, wy = np.where(self.board == Location.WHITE)
-
-            # calculate average distance from the corner
-            black_dist = 10 - np.average([abs(10 - bx), abs(10 - by)])
-            white_dist = 10 - np.average([abs(10 - wx), abs(10 - wy)])
-
-            self._problem = ProblemClass.LIVE if black_dist < white_dist else ProblemClass.KILL
+            live = classify_problems(self._board)[0]
+            self._problem = ProblemClass.LIVE if live else ProblemClass.KILL
 
         return self._problem
 
     @property
     def stones(self):
         if self._stones is None:
-            if self.problem == ProblemClass.LIVE:
-                self._stones = np.array(self._board == Location.BLACK, dtype=int)
-            elif self.problem == ProblemClass.KILL:
-                self._stones = np.array(self._board == Location.WHITE, dtype=int)
+            live = self.problem == ProblemClass.LIVE
+            self._stones = target_stones(self._board, live)[0].astype(int)
 
         return self._stones
 
+    @property
+    def region(self) -> np.ndarray:
+        """ Part of the board the problem lives in, moves are only generated there """
+        if self._region is None:
+            self._region = get_region(self._board)
+
+        return self._region
+
+    def _coords(self) -> List[CoordType]:
+        if self._region_coords is None:
+            self._region_coords = [(int(x), int(y)) for x, y in zip(*np.nonzero(self.region))]
+
+        return self._region_coords
+
     def copy(self):
         board, turn, score = self.state
         history = self.history
-        return TsumegoBoard(self.problem, self.stones,
+        copy = TsumegoBoard(self.problem, self.stones, self.region,
+                            board=board, turn=turn, score=score, history=history)
+        if self._patterns is not None:
+            copy._patterns = self._patterns.copy()
+
+        return copy
+
+    def framed(self):
+        """ Copy of the board with a tsumego frame filling the area outside the region """
+        defender = Location.BLACK if self.problem == ProblemClass.LIVE else Location.WHITE
+        frame = get_frame(self.region, defender)
+        outside = frame != Location.EMPTY
+
+        board, turn, score = self.state
+        board[outside] = frame[outside]
+
+        history = []
+        for history_board, history_turn, history_score in self._history:
+            history_board = np.copy(history_board)
+            history_board[outside] = frame[outside]
+            history.append((history_board, history_turn, history_score.copy()))
+
+        copy = TsumegoBoard(self.problem, self.stones, self.region,
                             board=board, turn=turn, score=score, history=history)
+        if self._patterns is not None:
+            copy._patterns = self._patterns.copy()
 
-    def _get_region(self, loc: Location, coord0: CoordType) -> ChainType:
+        return copy
+
+    def _get_region(self, loc: Location, coord0: CoordType) -> Tuple[ChainType, bool]:
+        """ Area not occupied by loc inside the problem region and whether it leaks out of it """
         explored = set()
         unexplored = {coord0}
+        region = self.region
+        leaks = False
 
         while unexplored:
             coord = unexplored.pop()
-            unexplored |= {coord for p, coord in self._get_adjacent(coord) if p != loc}
+            adjacent = {coord for p, coord in self._get_adjacent(coord) if p != loc}
+            inside = {coord for coord in adjacent if region[coord]}
+            leaks = leaks or len(inside) < len(adjacent)
 
+            unexplored |= inside
             explored.add(coord)
             unexplored -= explored
 
-        return frozenset(explored)
+        return frozenset(explored), leaks
 
     def _get_regions(self, color: Location):
         unexplored = np.array(self._board != color, dtype=int)
         regions = set()
-        for coord in product(range(19), range(19)):
+        for coord in self._coords():
 
             if unexplored[coord]:
-                region = self._get_region(color, coord)
-                regions.add(region)
+                region, leaks = self._get_region(color, coord)
                 unexplored[tuple(zip(*region))] = 0
 
+                if not leaks:
+                    regions.add(region)
+
         return regions
 
     def _get_groups(self, color: Location) -> Set[ChainType]:
         unexplored = np.array(self._board == color, dtype=int)
         groups = set()
 
-        for coord in product(range(19), range(19)):
+        for coord in self._coords():
 
             if unexplored[coord]:
                 group = self._get_group(coord)
@@ -135,7 +248,7 @@ class TsumegoBoard(GoBoard):
         return set(), set()
 
     def moves_to_consider(self):
-        moves = self.legal_moves
+        moves = self.legal_moves * self.region
 
         for loc in [Location.BLACK, Location.WHITE]:
             _, eyes = self.alive_groups(loc)
@@ -147,7 +260,12 @@ class TsumegoBoard(GoBoard):
     def stones_are_dead(self):
         return np.count_nonzero(self._board * self.stones) == 0
 
-    def solved(self) -> Optional[bool]:
+    def solved(self, eyes: bool = True) -> Optional[bool]:
+        """ Whether black solved the problem, None while it is open
+
+        With eyes, a defender reduced to a single eye space of known status is decided
+        early, see sgf_solver.board.eyes.
+        """
         if self.problem == ProblemClass.LIVE:
 
             if self.alive_groups(Location.BLACK)[0]:
@@ -161,10 +279,40 @@ class TsumegoBoard(GoBoard):
             if self.alive_groups(Location.WHITE)[0]:
                 return False
 
-            if not self._stones:
-                self._stones = self._count_target_stones()
-
             if self.stones_are_dead():
                 return True
 
-        return None
+        lives = self._eye_space_lives() if eyes else None
+        if lives is None:
+            return None
+
+        return lives == (self.problem == ProblemClass.LIVE)
+
+    def _eye_space_lives(self) -> Optional[bool]:
+        """ Whether the defender lives by the known status of its eye space
+
+        Only decides positions where all defender stones are one chain, its liberties are
+        one small empty area enclosed by the chain alone, and no adjacent attacker chain
+        can be captured before that area is filled.
+        """
+        defender = Location.BLACK if self.problem == ProblemClass.LIVE else Location.WHITE
+        stones = list(zip(*np.nonzero(self._board == defender)))
+        if not stones:
+            return None
+
+        chain = self._get_group(stones[0])
+        liberties = self._get_liberties(chain)
+        if len(chain) < len(stones) or not liberties:
+            return None
+
+        space = self._get_area(next(iter(liberties)))
+        if len(space) > EYE_SIZE or not liberties <= space or \
+                not self._get_chain_adjacent(Location.EMPTY, space) <= chain:
+            return None
+
+        for coord in self._get_chain_adjacent(defender, chain) - space:
+            if len(self._get_liberties(self._get_group(coord))) <= len(space):
+                return None
+
+        shape = eye_shape(space)
+        return None if shape is None else shape.lives(self.turn == defender)
@@ -2,13 +2,65 @@ import os
 
 BOARD_SHAPE = (19, 19)
 
+# empty lines kept around the problem stones when framing a tsumego
+REGION_MARGIN = 2
+FRAME_WALL = 2
+
 INPUT_DATA_SHAPE = (9, 19, 19)
 CHANNELS_AMOUNT = 16
 RESIDUAL_BLOCKS = 4
 L2_CONST = 1e-4
 
+# network sizes by name as (channels, residual blocks), the default one is the model above
+MODEL_CONFIGS = {
+    'nano': (8, 1),
+    'tiny': (8, 2),
+    'small': (CHANNELS_AMOUNT, RESIDUAL_BLOCKS),
+    'medium': (32, 6),
+    'large': (64, 8),
+}
+DEFAULT_CONFIG = 'small'
+# distillation: weight of the teacher outputs against the dataset labels
+DISTILL_ALPHA = 0.7
+
+# tree search: exploration constant and progressive widening width = base * (N + 1) ** exponent
+C_PUCT = 1.5
+WIDENING_BASE = 2
+WIDENING_EXPONENT = 0.5
+# share of the node limit kept when the tree is pruned
+PRUNE_TARGET = 0.8
+# attacker moves read by the tactical reader before a capture is left to the search
+TACTICS_DEPTH = 8
+
 base_path = os.path.join(os.path.dirname(__file__), os.path.pardir)
 
 PROBLEM_PATH = os.path.join(base_path, 'data')
 PROBLEM_DATASET = os.path.join(base_path, 'cho_chikun_{}.h5')
-WEIGHTS_PATH = os.path.join(base_path, f'weights/weights_{CHANNELS_AMOUNT}x{RESIDUAL_BLOCKS}.h5')
+WEIGHTS_FILE = os.path.join(base_path, 'weights/weights_{}x{}.h5')
+WEIGHTS_PATHS = {name: WEIGHTS_FILE.format(*size) for name, size in MODEL_CONFIGS.items()}
+WEIGHTS_PATH = WEIGHTS_PATHS[DEFAULT_CONFIG]
+PATTERN_TABLE = os.path.join(base_path, 'patterns.table')
+
+# pattern priors: samples of the average answer rate added to every pattern
+PATTERN_SMOOTHING = 10
+
+# status of enclosed eye spaces up to EYE_SIZE points, generated by sgf_solver.board.eyes
+EYE_SIZE = 7
+EYE_TABLE = os.path.join(os.path.dirname(__file__), 'board', 'eye_shapes.table')
+
+# solved positions kept by the solution cache
+SOLUTION_CACHE = os.path.join(base_path, 'solutions.sqlite')
+CACHE_ENTRIES = 100000
+
+# solving server: evaluations batched across concurrent searches
+SERVER_ADDRESS = ('127.0.0.1', 8019)
+PREDICT_BATCH = 32
+PREDICT_WAIT = 0.002
+SERVER_ROLLOUTS = 400
+
+# worker pool: problems solved by a worker process before it is replaced
+WORKER_TASKS = 200
+
+# playout evaluator: playouts per leaf, playout length as a multiple of the playout area
+PLAYOUTS = 16
+PLAYOUT_LENGTH = 3
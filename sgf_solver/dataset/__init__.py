@@ -0,0 +1,4 @@
+from .packed import PackedDataset, write_packed, h5_to_packed, packed_to_h5
+from .builder import build_dataset, find_sgf_files
+from .dedup import Deduplicator, position_key
+from .store import ProblemStore, build_index
@@ -0,0 +1,302 @@
+"""
+Dataset builder for the SGF problem corpus.
+
+Files are parsed in a process pool and their samples are written to shards as soon
+as SHARD_ROWS rows are collected, so memory stays bounded by the shard size. The
+shards are then merged into the final h5 dataset in the sorted file order, which
+makes the output independent of the amount of workers.
+
+Shards are kept next to the output together with a manifest that maps the content
+hash of every parsed SGF file to its rows. A rebuild only parses new or modified
+files, drops removed ones and skips the merge when nothing changed.
+
+With dedup enabled the merge drops positions seen before anywhere in the corpus
+(optionally up to symmetry) and merges their answers, see sgf_solver.dataset.dedup.
+"""
+import hashlib
+import json
+import os
+import time
+from multiprocessing import Pool
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+
+from sgf_solver.constants import INPUT_DATA_SHAPE, PROBLEM_PATH
+from sgf_solver.dataset.dedup import Deduplicator
+from sgf_solver.parser import TsumegoParser
+
+if TYPE_CHECKING:
+    import h5py
+
+SHARD_ROWS = 20000
+PARSE_CHUNK = 8
+MANIFEST_VERSION = 1
+
+FileSamplesType = Tuple[str, Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]], Optional[str]]
+
+
+def find_sgf_files(path: str = PROBLEM_PATH) -> List[str]:
+    sgf_files = []
+    for directory, _, files in os.walk(path):
+        for filename in files:
+            if os.path.splitext(filename)[1] == '.sgf':
+                sgf_files.append(os.path.join(directory, filename))
+
+    return sorted(sgf_files)
+
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def parse_file(path: str, extend: bool = False) -> FileSamplesType:
+    """ Samples of one SGF file as compact arrays, or the error that stopped parsing """
+    try:
+        problems, values, answers = TsumegoParser(path).get_dataset(extend)
+    except Exception as error:
+        return path, None, f'{type(error).__name__}: {error}'
+
+    return path, (np.array(problems, dtype=np.int8).reshape((-1, *INPUT_DATA_SHAPE)),
+                  np.array(values, dtype=np.int8).reshape(-1),
+                  np.array(answers, dtype=np.int8).reshape((-1, 19, 19))), None
+
+
+def _parse_extended(path: str) -> FileSamplesType:
+    return parse_file(path, extend=True)
+
+
+def write_shard(path: str, problems: np.ndarray, values: np.ndarray, answers: np.ndarray):
+    import h5py
+
+    with h5py.File(path, 'w') as shard:
+        shard.create_dataset('problems', data=problems)
+        shard.create_dataset('values', data=values)
+        shard.create_dataset('answers', data=answers)
+
+
+def _create_output(dataset: 'h5py.File'):
+    return {
+        'problems': dataset.create_dataset('problems', (0, *INPUT_DATA_SHAPE), dtype=np.int8,
+                                           maxshape=(None, *INPUT_DATA_SHAPE),
+                                           chunks=(256, *INPUT_DATA_SHAPE), compression='gzip'),
+        'values': dataset.create_dataset('values', (0,), dtype=np.int8, maxshape=(None,),
+                                         chunks=(4096,), compression='gzip'),
+        'answers': dataset.create_dataset('answers', (0, 19, 19), dtype=np.int8,
+                                          maxshape=(None, 19, 19), chunks=(1024, 19, 19),
+                                          compression='gzip'),
+        'source': dataset.create_dataset('source', (0,), dtype=np.int32, maxshape=(None,),
+                                         chunks=(4096,), compression='gzip'),
+    }
+
+
+def _read_sources(shards: dict, directory: str, sources: List[Tuple[str, int, int]]):
+    import h5py
+
+    for shard_name, start, stop in sources:
+        if shard_name not in shards:
+            shards[shard_name] = h5py.File(os.path.join(directory, shard_name), 'r')
+
+        shard = shards[shard_name]
+        yield tuple(shard[name][start:stop] for name in ('problems', 'values', 'answers'))
+
+
+def merge_rows(directory: str, sources: List[Tuple[str, int, int]], output: str,
+               deduplicator: Deduplicator = None, paths: List[str] = None):
+    """ Copy (shard, start, stop) row ranges in the given order into a gzip-compressed dataset
+
+    Every row records the number of its source range in 'source', and 'files' holds the
+    SGF path of every range when paths are given. With a deduplicator the sources are
+    read twice, once to index the positions and once to write the merged rows.
+    """
+    import h5py
+
+    shards = {}
+
+    if deduplicator is not None:
+        for samples in _read_sources(shards, directory, sources):
+            deduplicator.add(*samples)
+
+    with h5py.File(output, 'w') as dataset:
+        arrays = _create_output(dataset)
+
+        for number, samples in enumerate(_read_sources(shards, directory, sources)):
+            samples = (*samples, np.full(len(samples[0]), number, dtype=np.int32))
+            if deduplicator is not None:
+                samples = deduplicator.select(*samples)
+
+            for array, data in zip(arrays.values(), samples):
+                count = array.shape[0]
+                array.resize(count + len(data), axis=0)
+                array[count:] = data
+
+        if paths is not None:
+            dataset.create_dataset('files', data=paths, dtype=h5py.string_dtype())
+
+    for shard in shards.values():
+        shard.close()
+
+
+class ShardWriter:
+    """ Collects samples and writes them to numbered shards of about SHARD_ROWS rows
+
+    Every added key ends up in self.entries as {'shard': name, 'start': row, 'stop': row}.
+    """
+
+    def __init__(self, directory: str, first_shard: int = 0, shard_rows: int = SHARD_ROWS):
+        self.directory = directory
+        self.next_shard = first_shard
+        self.shard_rows = shard_rows
+        self.entries = {}
+        self._buffer = []
+        self._keys = []
+        self._rows = 0
+
+    def add(self, key: str, problems: np.ndarray, values: np.ndarray, answers: np.ndarray):
+        self._keys.append((key, self._rows, self._rows + len(problems)))
+        self._buffer.append((problems, values, answers))
+        self._rows += len(problems)
+
+        if self._rows >= self.shard_rows:
+            self.flush()
+
+    def flush(self) -> Optional[str]:
+        if not self._buffer:
+            return None
+
+        name = f'shard_{self.next_shard:05d}.h5'
+        write_shard(os.path.join(self.directory, name),
+                    *[np.concatenate(arrays) for arrays in zip(*self._buffer)])
+
+        for key, start, stop in self._keys:
+            self.entries[key] = {'shard': name, 'start': start, 'stop': stop}
+
+        self.next_shard += 1
+        self._buffer, self._keys, self._rows = [], [], 0
+        return name
+
+
+def load_manifest(directory: str, extend: bool) -> dict:
+    """ Manifest of the shard directory, empty if missing or built with other settings """
+    path = os.path.join(directory, 'manifest.json')
+    manifest = {'version': MANIFEST_VERSION, 'extend': extend, 'next_shard': 0,
+                'order': [], 'entries': {}, 'failed': {}}
+
+    if os.path.exists(path):
+        with open(path) as file:
+            stored = json.load(file)
+
+        if stored.get('version') == MANIFEST_VERSION and stored.get('extend') == extend:
+            manifest = stored
+
+    return manifest
+
+
+def save_manifest(directory: str, manifest: dict):
+    path = os.path.join(directory, 'manifest.json')
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(manifest, file)
+
+    os.replace(f'{path}.tmp', path)
+
+
+def _parse_files(files: List[str], writer: ShardWriter, extend: bool, workers: int,
+                 hashes: dict) -> dict:
+    """ Parse files into the writer keyed by content hash, returns failed hashes """
+    failed, rows = {}, 0
+    if not files:
+        return failed
+
+    start = time.time()
+
+    with Pool(workers) as pool:
+        parsed = pool.imap(_parse_extended if extend else parse_file, files, PARSE_CHUNK)
+
+        for done, (path, samples, error) in enumerate(parsed, start=1):
+            if samples is None:
+                failed[hashes[path]] = error
+            else:
+                writer.add(hashes[path], *samples)
+                rows += len(samples[0])
+
+            rate = done / (time.time() - start)
+            print(f"\rFiles: {done:-5d}/{len(files)} ({rate:.1f} files/s), "
+                  f"problems: {rows:-6d}", end='')
+    print()
+
+    writer.flush()
+    return failed
+
+
+def build_dataset(files: List[str], output: str, extend: bool = False,
+                  workers: int = None, shard_rows: int = SHARD_ROWS,
+                  dedup: bool = False, canonical: bool = False) -> List[str]:
+    """ Parse new or modified files in parallel and write output
+
+    dedup merges repeated positions across the corpus, canonical also treats
+    symmetric positions as repeated. Returns the files that failed to parse.
+    """
+    shard_dir = f'{output}.shards'
+    os.makedirs(shard_dir, exist_ok=True)
+
+    manifest = load_manifest(shard_dir, extend)
+    entries, failed = manifest['entries'], manifest['failed']
+
+    hashes = {path: file_hash(path) for path in files}
+    order = [[path, hashes[path]] for path in files]
+
+    merge = {'dedup': dedup, 'canonical': dedup and canonical}
+
+    pending = {}
+    for path, content_hash in order:
+        if content_hash not in entries and content_hash not in failed:
+            pending.setdefault(content_hash, path)
+
+    if (pending or manifest['order'] != order or manifest.get('merge') != merge
+            or not os.path.exists(output)):
+        writer = ShardWriter(shard_dir, manifest['next_shard'], shard_rows)
+        failed.update(_parse_files(list(pending.values()), writer, extend, workers, hashes))
+        entries.update(writer.entries)
+
+        current = set(hashes.values())
+        entries = {key: entry for key, entry in entries.items() if key in current}
+        failed = {key: error for key, error in failed.items() if key in current}
+
+        sources, paths = [], []
+        for path, content_hash in order:
+            if content_hash in entries:
+                entry = entries[content_hash]
+                sources.append((entry['shard'], entry['start'], entry['stop']))
+                paths.append(path)
+
+        deduplicator = Deduplicator(canonical) if dedup else None
+        merge_rows(shard_dir, sources, output, deduplicator, paths)
+
+        if deduplicator is not None:
+            print(deduplicator.report())
+
+        # the manifest must stop naming a shard before the shard is removed
+        manifest.update(next_shard=writer.next_shard, order=order, entries=entries, failed=failed,
+                        merge=merge)
+        save_manifest(shard_dir, manifest)
+
+        used = {entry['shard'] for entry in entries.values()}
+        for name in os.listdir(shard_dir):
+            if name.startswith('shard_') and name not in used:
+                os.remove(os.path.join(shard_dir, name))
+
+    return [f'{path}: {failed[content_hash]}' for path, content_hash in order
+            if content_hash in failed]
+
+
+if __name__ == '__main__':
+    import sys
+    from sgf_solver.constants import PROBLEM_DATASET
+
+    extend = '--extend' in sys.argv
+    errors = build_dataset(find_sgf_files(), PROBLEM_DATASET.format('big' if extend else 'small'),
+                           extend, dedup='--dedup' in sys.argv, canonical='--canonical' in sys.argv)
+
+    for error in errors:
+        print(error)
@@ -0,0 +1,103 @@
+"""
+Corpus-wide deduplication of dataset rows.
+
+Rows are keyed by a 16 byte BLAKE2 digest of their int8 planes, optionally after
+bringing the position to its canonical symmetry (the transform with the smallest
+bytes). Rows sharing a key are merged into the first one: a correct row wins over
+wrong ones, and the answer counts of all merged rows with the kept value are
+summed like TsumegoParser merges the samples of one file, saturating at int8.
+"""
+import hashlib
+
+import numpy as np
+
+from sgf_solver.symmetry import canonical_symmetry, transform, transform_batch
+
+
+def position_key(problem: np.ndarray) -> bytes:
+    return hashlib.blake2b(np.asarray(problem, dtype=np.int8).tobytes(), digest_size=16).digest()
+
+
+class Deduplicator:
+    """
+    Two passes over the same rows: add() every batch to build the index,
+    then select() the same batches in the same order to get the merged rows.
+    """
+
+    def __init__(self, canonical: bool = False):
+        self.canonical = canonical
+        self._groups = {}
+        self._keep = bytearray()
+        self._symmetries = bytearray()
+        self._answers = {}
+        self._selected = 0
+
+        self.duplicates = 0
+        self.conflicts = 0
+
+    @property
+    def rows(self) -> int:
+        return len(self._keep)
+
+    @property
+    def unique(self) -> int:
+        return self.rows - self.duplicates
+
+    def add(self, problems: np.ndarray, values: np.ndarray, answers: np.ndarray):
+        for problem, value, answer in zip(problems, values, answers):
+            row, k = len(self._keep), 0
+            if self.canonical:
+                k, problem = canonical_symmetry(np.asarray(problem, dtype=np.int8))
+                answer = transform(answer, k)
+
+            self._keep.append(1)
+            self._symmetries.append(k)
+            key = position_key(problem)
+
+            if key not in self._groups:
+                self._groups[key] = row, value
+                continue
+
+            self.duplicates += 1
+            first, first_value = self._groups[key]
+
+            if value > first_value:
+                # a correct answer replaces the wrong ones found before
+                self.conflicts += 1
+                self._keep[first] = 0
+                self._answers.pop(first, None)
+                self._groups[key] = row, value
+            else:
+                self.conflicts += value < first_value
+                self._keep[row] = 0
+
+                if value == first_value:
+                    merged = self._answers.get(first)
+                    if merged is None:
+                        merged = np.zeros(361, dtype=np.int32)
+                    self._answers[first] = merged + np.reshape(answer, -1)
+
+    def select(self, problems: np.ndarray, values: np.ndarray, answers: np.ndarray, *extra):
+        """ Kept rows of the next batch with merged answers, extra arrays are filtered alike """
+        start, stop = self._selected, self._selected + len(problems)
+        self._selected = stop
+
+        keep = np.frombuffer(self._keep, dtype=np.uint8)[start:stop].astype(bool)
+        rows = np.arange(start, stop)[keep]
+        problems, values, answers = problems[keep], values[keep], np.array(answers[keep])
+
+        if self.canonical and len(rows):
+            ks = np.frombuffer(self._symmetries, dtype=np.uint8)[rows]
+            problems, answers = transform_batch(problems, ks), transform_batch(answers, ks)
+
+        for position, row in enumerate(rows):
+            if row in self._answers:
+                merged = answers[position] + self._answers[row].reshape(answers.shape[1:])
+                answers[position] = np.minimum(merged, np.iinfo(np.int8).max)
+
+        return (problems, values, answers, *[np.asarray(array)[keep] for array in extra])
+
+    def report(self) -> str:
+        rate = self.duplicates / self.rows if self.rows else 0
+        return (f"Rows: {self.rows}, unique: {self.unique}, duplicates: {self.duplicates} "
+                f"({rate:.1%}), correct/wrong conflicts: {self.conflicts}")
@@ -0,0 +1,153 @@
+"""
+Bit-packed dataset format.
+
+Every position is stored as 17 bit planes packed with ``np.packbits``: a black and
+a white plane for each of the 8 board planes (2 bits per point) and the legal move
+plane. A row takes 782 bytes instead of 9 * 361 wide integers. Answers are stored
+as move indices with row offsets, a move appears once per merged answer. Files are
+written with ``sgf_solver.storage`` and opened memory-mapped.
+"""
+from typing import Union
+
+import numpy as np
+
+from sgf_solver.annotations import DatasetType
+from sgf_solver.constants import INPUT_DATA_SHAPE
+from sgf_solver.storage import write_arrays, read_arrays
+
+PACKED_VERSION = 1
+STONE_PLANES = INPUT_DATA_SHAPE[0] - 1
+CONVERT_CHUNK = 4096
+
+IndexType = Union[int, slice, np.ndarray]
+
+
+def pack_problems(problems: np.ndarray) -> np.ndarray:
+    """ (N, 9, 19, 19) planes of -1, 0, 1 to (N, 17, 46) packed bits """
+    problems = np.asarray(problems).reshape((-1, INPUT_DATA_SHAPE[0], 361))
+    stones = problems[:, :STONE_PLANES]
+
+    bits = np.empty((len(problems), 2 * STONE_PLANES + 1, 361), dtype=bool)
+    bits[:, 0:-1:2] = stones > 0
+    bits[:, 1:-1:2] = stones < 0
+    bits[:, -1] = problems[:, -1] != 0
+
+    return np.packbits(bits, axis=-1)
+
+
+def unpack_problems(planes: np.ndarray) -> np.ndarray:
+    """ Inverse of pack_problems, returns int8 planes """
+    bits = np.unpackbits(planes, axis=-1, count=361).view(np.int8)
+
+    problems = np.empty((len(planes), INPUT_DATA_SHAPE[0], 361), dtype=np.int8)
+    problems[:, :STONE_PLANES] = bits[:, 0:-1:2] - bits[:, 1:-1:2]
+    problems[:, -1] = bits[:, -1]
+
+    return problems.reshape((-1, *INPUT_DATA_SHAPE))
+
+
+def pack_answers(answers: np.ndarray):
+    """ (N, 19, 19) answer counts to (offsets, moves) """
+    answers = np.asarray(answers).reshape((-1, 361))
+    rows, moves = np.nonzero(answers)
+    counts = answers[rows, moves].astype(np.int64)
+
+    offsets = np.zeros(len(answers) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, weights=counts, minlength=len(answers)), out=offsets[1:])
+
+    return offsets, np.repeat(moves, counts).astype(np.int16)
+
+
+def write_packed(path: str, problems: np.ndarray, values: np.ndarray, answers: np.ndarray,
+                 **attrs):
+    offsets, moves = pack_answers(answers)
+    write_arrays(path, {
+        'planes': pack_problems(problems),
+        'values': np.asarray(values, dtype=np.int8).reshape(-1),
+        'answer_offsets': offsets,
+        'answer_moves': moves,
+    }, {'version': PACKED_VERSION, **attrs})
+
+
+class PackedDataset:
+    """ Random access to a packed dataset, rows are decoded on request """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._arrays, self.attrs = read_arrays(path)
+
+    def __len__(self):
+        return len(self._arrays['planes'])
+
+    def _rows(self, index: IndexType) -> np.ndarray:
+        return np.arange(len(self))[index].reshape(-1)
+
+    def problems(self, index: IndexType = slice(None)) -> np.ndarray:
+        return unpack_problems(self._arrays['planes'][self._rows(index)])
+
+    def values(self, index: IndexType = slice(None)) -> np.ndarray:
+        return np.array(self._arrays['values'][self._rows(index)])
+
+    def answer_moves(self, row: int) -> np.ndarray:
+        offsets = self._arrays['answer_offsets']
+        return np.array(self._arrays['answer_moves'][offsets[row]:offsets[row + 1]])
+
+    def answers(self, index: IndexType = slice(None)) -> np.ndarray:
+        rows = self._rows(index)
+        offsets = self._arrays['answer_offsets']
+        starts, stops = offsets[rows], offsets[rows + 1]
+
+        lengths = stops - starts
+        owners = np.repeat(np.arange(len(rows)), lengths)
+        shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        moves = self._arrays['answer_moves'][np.arange(len(owners)) + shifts]
+
+        answers = np.zeros((len(rows), 361), dtype=np.int8)
+        np.add.at(answers, (owners, moves), 1)
+        return answers.reshape((-1, 19, 19))
+
+    def dataset(self, index: IndexType = slice(None)) -> DatasetType:
+        return self.problems(index), self.values(index), self.answers(index)
+
+
+def h5_to_packed(h5_path: str, packed_path: str, chunk: int = CONVERT_CHUNK):
+    """ Convert a dataset written by the parser to the packed format """
+    import h5py
+
+    planes, values, offsets, moves = [], [], [np.zeros(1, dtype=np.int64)], []
+
+    with h5py.File(h5_path, 'r') as dataset:
+        for start in range(0, len(dataset['problems']), chunk):
+            stop = start + chunk
+            planes.append(pack_problems(dataset['problems'][start:stop]))
+            values.append(np.asarray(dataset['values'][start:stop], dtype=np.int8))
+
+            chunk_offsets, chunk_moves = pack_answers(dataset['answers'][start:stop])
+            offsets.append(chunk_offsets[1:] + offsets[-1][-1])
+            moves.append(chunk_moves)
+
+    write_arrays(packed_path, {
+        'planes': np.concatenate(planes) if planes else np.zeros((0, 17, 46), dtype=np.uint8),
+        'values': np.concatenate(values) if values else np.zeros(0, dtype=np.int8),
+        'answer_offsets': np.concatenate(offsets),
+        'answer_moves': np.concatenate(moves) if moves else np.zeros(0, dtype=np.int16),
+    }, {'version': PACKED_VERSION})
+
+
+def packed_to_h5(packed_path: str, h5_path: str, chunk: int = CONVERT_CHUNK):
+    """ Convert a packed dataset back to the parser's h5 layout """
+    import h5py
+
+    packed = PackedDataset(packed_path)
+    count = len(packed)
+
+    with h5py.File(h5_path, 'w') as dataset:
+        problems = dataset.create_dataset('problems', (count, *INPUT_DATA_SHAPE), dtype=int,
+                                          compression='gzip')
+        values = dataset.create_dataset('values', (count,), dtype=int, compression='gzip')
+        answers = dataset.create_dataset('answers', (count, 19, 19), dtype=int,
+                                         compression='gzip')
+
+        for start in range(0, count, chunk):
+            rows = slice(start, min(start + chunk, count))
+            problems[rows], values[rows], answers[rows] = packed.dataset(rows)
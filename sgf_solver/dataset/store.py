@@ -0,0 +1,257 @@
+"""
+Random access to the problems of an h5 dataset.
+
+The dataset is opened once and rows are decoded a chunk at a time, the last
+CACHE_CHUNKS chunks are kept in an LRU cache. Facts about every problem are
+computed once into an index file next to the dataset (``<dataset>.index``, a
+``sgf_solver.storage`` container) and memory-mapped, so selecting problems by
+class, stone counts, bounding box, source or answers never reads the dataset.
+
+Positions are taken from the first plane, relative to the side to move, the same
+way ``TsumegoBoard`` sees them.
+"""
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from sgf_solver.board import TsumegoBoard
+from sgf_solver.board.tsumego import classify_problems, target_stones
+from sgf_solver.constants import BOARD_SHAPE, PROBLEM_DATASET
+from sgf_solver.enums import ProblemClass
+from sgf_solver.storage import read_arrays, write_arrays
+
+INDEX_VERSION = 1
+INDEX_CHUNK = 4096
+CACHE_CHUNKS = 64
+DEFAULT_CHUNK_ROWS = 256
+
+RangeType = Union[int, Tuple[Optional[int], Optional[int]]]
+
+
+def _bounding_boxes(positions: np.ndarray) -> np.ndarray:
+    """ (x0, x1, y0, y1) of the stones of every position, -1 for empty boards """
+    boxes = np.full((len(positions), 4), -1, dtype=np.int8)
+
+    for axis, column in ((2, 0), (1, 2)):
+        lines = positions.any(axis=axis)
+        found = lines.any(axis=1)
+        boxes[found, column] = lines[found].argmax(axis=1)
+        boxes[found, column + 1] = 18 - lines[found, ::-1].argmax(axis=1)
+
+    return boxes
+
+
+def index_problems(positions: np.ndarray, values: np.ndarray,
+                   answers: np.ndarray) -> Dict[str, np.ndarray]:
+    """ Index arrays of (N, 19, 19) positions """
+    positions = np.asarray(positions).reshape((-1, *BOARD_SHAPE))
+    live = classify_problems(positions)
+
+    return {
+        'live': live,
+        'targets': np.packbits(target_stones(positions, live).reshape((-1, 361)), axis=1),
+        'black': np.count_nonzero(positions > 0, axis=(1, 2)).astype(np.int16),
+        'white': np.count_nonzero(positions < 0, axis=(1, 2)).astype(np.int16),
+        'bbox': _bounding_boxes(positions != 0),
+        'values': np.asarray(values, dtype=np.int8).reshape(-1),
+        'answers': np.count_nonzero(np.reshape(answers, (-1, 361)), axis=1).astype(np.int16),
+    }
+
+
+def _dataset_stamp(path: str) -> dict:
+    stat = os.stat(path)
+    return {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def build_index(path: str) -> str:
+    """ Compute the index of a dataset, returns the index path """
+    import h5py
+
+    with h5py.File(path, 'r') as dataset:
+        count = dataset['problems'].shape[0]
+        parts = []
+
+        for start in range(0, count, INDEX_CHUNK):
+            stop = min(start + INDEX_CHUNK, count)
+            parts.append(index_problems(dataset['problems'][start:stop, 0],
+                                        dataset['values'][start:stop],
+                                        dataset['answers'][start:stop]))
+
+        if not parts:
+            parts.append(index_problems(np.zeros((0, *BOARD_SHAPE)), [], np.zeros((0, 361))))
+
+        arrays = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        if 'source' in dataset and 'files' in dataset:
+            arrays['source'] = dataset['source'][:].astype(np.int32)
+            files = [name.decode() if isinstance(name, bytes) else name
+                     for name in dataset['files'][:]]
+        else:
+            arrays['source'] = np.full(count, -1, dtype=np.int32)
+            files = []
+
+    index_path = f'{path}.index'
+    write_arrays(index_path, arrays, dict(_dataset_stamp(path), rows=count, files=files))
+    return index_path
+
+
+class ProblemStore:
+    """
+    Problems of a dataset by row, with their metadata and selection by metadata.
+
+    The index is rebuilt when the dataset changed since it was written.
+    """
+
+    def __init__(self, path: str = PROBLEM_DATASET.format('small'),
+                 cache_chunks: int = CACHE_CHUNKS):
+        import h5py
+
+        self.path = path
+        self.cache_chunks = cache_chunks
+        self.hits = 0
+        self.misses = 0
+
+        self._dataset = h5py.File(path, 'r')
+        problems = self._dataset['problems']
+        self._rows = problems.shape[0]
+        self._chunk_rows = problems.chunks[0] if problems.chunks else DEFAULT_CHUNK_ROWS
+        self._chunks = OrderedDict()
+
+        self.index, attrs = self._open_index()
+        self.files = attrs['files']
+
+    def _open_index(self):
+        index_path = f'{self.path}.index'
+
+        if os.path.exists(index_path):
+            arrays, attrs = read_arrays(index_path)
+            stamp = _dataset_stamp(self.path)
+            if all(attrs.get(key) == value for key, value in stamp.items()):
+                return arrays, attrs
+
+        return read_arrays(build_index(self.path))
+
+    def close(self):
+        self._dataset.close()
+        self._chunks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._rows
+
+    def _chunk(self, number: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if number in self._chunks:
+            self.hits += 1
+            self._chunks.move_to_end(number)
+            return self._chunks[number]
+
+        self.misses += 1
+        start = number * self._chunk_rows
+        stop = min(start + self._chunk_rows, self._rows)
+        chunk = tuple(self._dataset[name][start:stop] for name in ('problems', 'values', 'answers'))
+
+        self._chunks[number] = chunk
+        if len(self._chunks) > self.cache_chunks:
+            self._chunks.popitem(last=False)
+
+        return chunk
+
+    def __getitem__(self, row: int) -> Tuple[np.ndarray, int, np.ndarray]:
+        """ (problem planes, value, answers) of a row """
+        if not -self._rows <= row < self._rows:
+            raise IndexError(row)
+
+        number, offset = divmod(row % self._rows, self._chunk_rows)
+        problems, values, answers = self._chunk(number)
+        return problems[offset], int(values[offset]), answers[offset]
+
+    def problems(self, rows: Iterable[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Stacked rows in the given order, every chunk is decoded at most once """
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        if np.any((rows < -self._rows) | (rows >= self._rows)):
+            raise IndexError(rows[(rows < -self._rows) | (rows >= self._rows)][0])
+
+        numbers, offsets = np.divmod(rows % max(self._rows, 1), self._chunk_rows)
+        stacked = [np.empty((len(rows), *self._dataset[name].shape[1:]),
+                            dtype=self._dataset[name].dtype)
+                   for name in ('problems', 'values', 'answers')]
+
+        for number in np.unique(numbers):
+            chunk_rows = numbers == number
+            for array, chunk in zip(stacked, self._chunk(int(number))):
+                array[chunk_rows] = chunk[offsets[chunk_rows]]
+
+        return tuple(stacked)
+
+    def problem_class(self, row: int) -> ProblemClass:
+        return ProblemClass.LIVE if self.index['live'][row] else ProblemClass.KILL
+
+    def targets(self, row: int) -> np.ndarray:
+        """ Mask of the stones to save or to kill """
+        return np.unpackbits(self.index['targets'][row], count=361).reshape(BOARD_SHAPE)
+
+    def source(self, row: int) -> Optional[str]:
+        number = int(self.index['source'][row])
+        return self.files[number] if 0 <= number < len(self.files) else None
+
+    def metadata(self, row: int) -> dict:
+        x0, x1, y0, y1 = (int(bound) for bound in self.index['bbox'][row])
+        return {
+            'problem': self.problem_class(row),
+            'targets': self.targets(row),
+            'black': int(self.index['black'][row]),
+            'white': int(self.index['white'][row]),
+            'bbox': (x0, x1, y0, y1),
+            'value': int(self.index['values'][row]),
+            'answers': int(self.index['answers'][row]),
+            'source': self.source(row),
+        }
+
+    def board(self, row: int) -> TsumegoBoard:
+        """ Board of a row with the indexed problem class and target stones """
+        problem, _, _ = self[row]
+        return TsumegoBoard(self.problem_class(row), self.targets(row).astype(int),
+                            board=problem[0])
+
+    def select(self, problem: ProblemClass = None, value: int = None,
+               black: RangeType = None, white: RangeType = None, answers: RangeType = None,
+               source: str = None, within: Tuple[int, int, int, int] = None) -> np.ndarray:
+        """ Rows matching all given conditions
+
+        Counts are an exact number or a (min, max) range with None for no bound, within
+        keeps problems whose stones are inside the (x0, x1, y0, y1) box.
+        """
+        index = self.index
+        selected = np.ones(self._rows, dtype=bool)
+
+        if problem is not None:
+            selected &= index['live'] == (problem == ProblemClass.LIVE)
+        if value is not None:
+            selected &= index['values'] == value
+
+        for name, bounds in (('black', black), ('white', white), ('answers', answers)):
+            if bounds is None:
+                continue
+            low, high = (bounds, bounds) if np.isscalar(bounds) else bounds
+            if low is not None:
+                selected &= index[name] >= low
+            if high is not None:
+                selected &= index[name] <= high
+
+        if source is not None:
+            numbers = [number for number, name in enumerate(self.files) if name == source]
+            selected &= np.isin(index['source'], numbers)
+
+        if within is not None:
+            x0, x1, y0, y1 = within
+            bbox = index['bbox']
+            selected &= ((bbox[:, 0] >= x0) & (bbox[:, 1] <= x1) &
+                         (bbox[:, 2] >= y0) & (bbox[:, 3] <= y1))
+
+        return np.flatnonzero(selected)
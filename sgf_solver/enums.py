@@ -10,3 +10,8 @@ class Location(IntEnum):
 class ProblemClass(Enum):
     LIVE = 'live'
     KILL = 'kill'
+
+
+class Augmentation(Enum):
+    RANDOM = 'random'
+    CYCLE = 'cycle'
@@ -8,3 +8,7 @@ class IllegalMoveError(Exception):
 
 class ParserError(Exception):
     pass
+
+
+class StorageError(Exception):
+    pass
@@ -1,2 +1,23 @@
-from .model import create_model
-from .train import train_model
+# Keras is only imported once one of these names is actually requested,
+# so that ``import sgf_solver.model`` stays cheap for board/parser tools.
+_LAZY_ATTRIBUTES = {
+    'create_model': 'sgf_solver.model.model',
+    'load_model': 'sgf_solver.model.model',
+    'weights_path': 'sgf_solver.model.model',
+    'BatchingModel': 'sgf_solver.model.batching',
+    'PatternModel': 'sgf_solver.model.patterns',
+    'PatternTable': 'sgf_solver.model.patterns',
+    'train_model': 'sgf_solver.model.train',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+    value = getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,95 @@
+"""
+Model wrapper batching predictions of concurrent callers.
+
+Every search evaluates one position at a time, so searches running in parallel
+threads call ``predict`` with single rows. ``BatchingModel.predict`` queues the
+rows and blocks, a single worker thread gathers queued rows for up to
+PREDICT_WAIT seconds or PREDICT_BATCH rows and runs the wrapped model once on
+all of them. The wrapped model is only ever called from the worker thread.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from sgf_solver.constants import INPUT_DATA_SHAPE, PREDICT_BATCH, PREDICT_WAIT
+
+
+class BatchingModel:
+
+    def __init__(self, model, max_batch: int = PREDICT_BATCH, max_wait: float = PREDICT_WAIT):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self.batches = 0
+        self.rows = 0
+
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='batching-model', daemon=True)
+        self._worker.start()
+
+    @property
+    def mean_batch(self) -> float:
+        return self.rows / self.batches if self.batches else 0
+
+    def warm_up(self):
+        """ Run a full batch once, so the first requests don't pay for graph building """
+        self.predict(np.zeros((self.max_batch, *INPUT_DATA_SHAPE)))
+
+    def predict(self, data):
+        """ (values, policies) of the positions, called the way Node.evaluate calls a model """
+        inputs = np.asarray(data[0] if isinstance(data, list) else data, dtype=float)
+
+        future = Future()
+        self._queue.put((inputs, future))
+        return future.result()
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _gather(self, first):
+        pending = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while rows < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+
+            if item is None:
+                self._queue.put(None)
+                break
+
+            pending.append(item)
+            rows += len(item[0])
+
+        return pending
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            pending = self._gather(first)
+            try:
+                values, policies = self.model.predict(np.concatenate([rows for rows, _ in pending]))
+            except Exception as error:
+                for _, future in pending:
+                    future.set_exception(error)
+                continue
+
+            self.batches += 1
+            self.rows += len(values)
+
+            start = 0
+            for rows, future in pending:
+                stop = start + len(rows)
+                future.set_result((values[start:stop], policies[start:stop]))
+                start = stop
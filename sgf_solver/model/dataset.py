@@ -0,0 +1,173 @@
+import threading
+from math import ceil
+from queue import Queue
+from typing import Iterable, Iterator, Tuple
+
+import h5py
+import numpy as np
+
+from sgf_solver.constants import DISTILL_ALPHA, INPUT_DATA_SHAPE
+from sgf_solver.enums import Augmentation
+from sgf_solver.symmetry import SYMMETRIES, transform_batch
+
+DEFAULT_BLOCK_SIZE = 1024
+SHUFFLE_BLOCKS = 8
+PREFETCH_BATCHES = 2
+
+
+class ProblemBatches:
+    """
+    Endless shuffled float32 batches of (problems, [values, answers]) from a dataset file.
+
+    Rows are read as contiguous blocks aligned to the h5 chunks; every epoch the blocks
+    are shuffled, SHUFFLE_BLOCKS of them are read at once and their rows are shuffled
+    together. Memory use depends on the block size, not on the dataset size.
+
+    With augmentation every sample gets one of the 8 board symmetries applied to its
+    planes and answer, either random or cycled so that it changes every epoch.
+    """
+
+    def __init__(self, path: str, blocks: np.ndarray, block_size: int, count: int,
+                 batch_size: int = 256, shuffle: bool = True, seed: int = 0,
+                 augment: Augmentation = None):
+        self.path = path
+        self.blocks = blocks
+        self.block_size = block_size
+        self.count = count
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.augment = augment
+
+    @classmethod
+    def split(cls, path: str, batch_size: int = 256, validation_split: float = 0.2,
+              seed: int = 0, augment: Augmentation = None
+              ) -> Tuple['ProblemBatches', 'ProblemBatches']:
+        """ Training and validation batches, validation blocks are held out by index """
+        with h5py.File(path, 'r') as dataset:
+            problems = dataset['problems']
+            count = problems.shape[0]
+            block_size = problems.chunks[0] if problems.chunks else DEFAULT_BLOCK_SIZE
+
+        blocks = np.random.RandomState(seed).permutation(ceil(count / block_size))
+        validation_count = int(round(len(blocks) * validation_split))
+
+        validation = cls(path, np.sort(blocks[:validation_count]), block_size, count,
+                         batch_size, shuffle=False)
+        train = cls(path, np.sort(blocks[validation_count:]), block_size, count,
+                    batch_size, seed=seed, augment=augment)
+        return train, validation
+
+    @property
+    def rows(self) -> int:
+        starts = self.blocks * self.block_size
+        return int(np.sum(np.minimum(starts + self.block_size, self.count) - starts))
+
+    def __len__(self):
+        return ceil(self.rows / self.batch_size)
+
+    def _read(self, dataset: h5py.File, blocks: np.ndarray):
+        problems, values, answers = [], [], []
+
+        for block in blocks:
+            start = block * self.block_size
+            stop = min(start + self.block_size, self.count)
+
+            problems.append(dataset['problems'].astype(np.float32)[start:stop])
+            values.append(dataset['values'].astype(np.float32)[start:stop])
+            answers.append(dataset['answers'].astype(np.float32)[start:stop])
+
+        problems = np.concatenate(problems).reshape((-1, *INPUT_DATA_SHAPE))
+        values = np.concatenate(values).reshape((-1, 1))
+        answers = np.concatenate(answers).reshape((-1, 361))
+        return problems, values, answers
+
+    def _batch(self, problems, values, answers, random, position: int, number: int):
+        if self.augment is Augmentation.RANDOM:
+            ks = random.randint(SYMMETRIES, size=len(problems))
+        elif self.augment is Augmentation.CYCLE:
+            ks = (np.arange(position, position + len(problems)) + number) % SYMMETRIES
+        else:
+            return problems, [values, answers]
+
+        return transform_batch(problems, ks), [values, transform_batch(answers, ks)]
+
+    def epoch(self, number: int = 0) -> Iterator:
+        """ Batches of one pass over the blocks """
+        blocks = self.blocks
+        random = np.random.RandomState(self.seed + number)
+
+        if self.shuffle:
+            blocks = random.permutation(blocks)
+
+        with h5py.File(self.path, 'r') as dataset:
+            rest = None
+            position = 0
+
+            for group in range(0, len(blocks), SHUFFLE_BLOCKS):
+                arrays = self._read(dataset, blocks[group:group + SHUFFLE_BLOCKS])
+
+                if rest is not None:
+                    arrays = [np.concatenate(pair) for pair in zip(rest, arrays)]
+
+                if self.shuffle:
+                    order = random.permutation(len(arrays[0]))
+                    arrays = [array[order] for array in arrays]
+
+                full = len(arrays[0]) // self.batch_size * self.batch_size
+                for start in range(0, full, self.batch_size):
+                    batch = [array[start:start + self.batch_size] for array in arrays]
+                    yield self._batch(*batch, random, position, number)
+                    position += self.batch_size
+
+                rest = [array[full:] for array in arrays]
+
+            if rest is not None and len(rest[0]):
+                yield self._batch(*rest, random, position, number)
+
+    def __iter__(self) -> Iterator:
+        number = 0
+        while True:
+            yield from self.epoch(number)
+            number += 1
+
+
+def prefetch(batches: Iterable, size: int = PREFETCH_BATCHES) -> Iterator:
+    """ Produce batches on a background thread while the consumer works on the current one """
+    queue = Queue(maxsize=size)
+    done = object()
+
+    def produce():
+        try:
+            for batch in batches:
+                queue.put(batch)
+        except Exception as error:
+            queue.put(error)
+        queue.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    while True:
+        batch = queue.get()
+
+        if batch is done:
+            return
+        if isinstance(batch, Exception):
+            raise batch
+
+        yield batch
+
+
+def distill(batches: Iterable, teacher, alpha: float = DISTILL_ALPHA) -> Iterator:
+    """ Batches with targets blended from the teacher outputs and the dataset labels
+
+    The answers are scaled to a distribution first, so the blended policy targets stay
+    comparable to the teacher softmax whatever the number of correct moves.
+    """
+    for problems, (values, answers) in batches:
+        teacher_values, teacher_policies = (np.asarray(output, dtype=np.float32)
+                                            for output in teacher.predict_on_batch(problems))
+        answers = answers / np.maximum(answers.sum(axis=1, keepdims=True), 1)
+
+        yield problems, [alpha * teacher_values + (1 - alpha) * values,
+                         alpha * teacher_policies + (1 - alpha) * answers]
@@ -5,27 +5,35 @@ from keras.models import Model
 from keras.optimizers import Adam
 from keras.regularizers import l2
 
-from sgf_solver.constants import INPUT_DATA_SHAPE, CHANNELS_AMOUNT, RESIDUAL_BLOCKS, L2_CONST
+from sgf_solver.constants import (
+    INPUT_DATA_SHAPE, L2_CONST, MODEL_CONFIGS, DEFAULT_CONFIG, WEIGHTS_PATHS,
+)
 
 RegularizedConv2D = partial(Conv2D, data_format='channels_first')
 PaddedConv2D = partial(RegularizedConv2D, padding='same', kernel_regularizer=l2(L2_CONST))
 
 
-def create_model():
+def weights_path(config: str = DEFAULT_CONFIG) -> str:
+    """ Weights file of a network size from MODEL_CONFIGS """
+    return WEIGHTS_PATHS[config]
+
+
+def create_model(summary: bool = True, config: str = DEFAULT_CONFIG):
+    channels, blocks = MODEL_CONFIGS[config]
     input_ = Input(shape=INPUT_DATA_SHAPE)
 
     layer = input_
-    layer = RegularizedConv2D(CHANNELS_AMOUNT, (1, 1))(layer)
+    layer = RegularizedConv2D(channels, (1, 1))(layer)
     layer = BatchNormalization()(layer)
     layer = Activation('relu')(layer)
 
-    for _ in range(RESIDUAL_BLOCKS):
+    for _ in range(blocks):
         res = layer
-        layer = PaddedConv2D(CHANNELS_AMOUNT, (3, 3))(layer)
+        layer = PaddedConv2D(channels, (3, 3))(layer)
         layer = BatchNormalization()(layer)
         layer = Activation('relu')(layer)
 
-        layer = PaddedConv2D(CHANNELS_AMOUNT, (3, 3))(layer)
+        layer = PaddedConv2D(channels, (3, 3))(layer)
         layer = BatchNormalization()(layer)
 
         layer = Add()([layer, res])
@@ -55,5 +63,14 @@ def create_model():
         metrics=["accuracy"]
     )
 
-    model.summary()
+    if summary:
+        model.summary()
+
+    return model
+
+
+def load_model(path: str = None, config: str = DEFAULT_CONFIG):
+    """ Model with trained weights, built without printing its summary """
+    model = create_model(summary=False, config=config)
+    model.load_weights(path or weights_path(config))
     return model
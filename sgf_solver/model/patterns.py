@@ -0,0 +1,254 @@
+"""
+Pattern priors, a move policy without the network.
+
+The pattern of a point is the color of its 8 neighbours relative to the side to
+move (empty, own, opponent, off the board), 2 bits each, clockwise from the top
+left. With diamond patterns the 4 points two lines away add 8 more bits.
+
+``pattern_codes`` computes the codes of whole stacks of positions with shifted
+planes, ``PatternCodes`` keeps the codes of one board up to date as stones are
+placed and captured, ``GoBoard.patterns`` keeps one in step with the moves of a
+board and its copies. Priors are learned from dataset samples: how often an empty
+point with a pattern was an answer, smoothed towards the average answer rate.
+
+    python -m sgf_solver.model.patterns [dataset.h5 | sgf directory] [--diamond]
+"""
+from typing import TYPE_CHECKING, Dict, Iterable, Tuple
+
+import numpy as np
+
+from sgf_solver.annotations import CoordType
+from sgf_solver.constants import BOARD_SHAPE, PATTERN_SMOOTHING, PATTERN_TABLE
+from sgf_solver.enums import Location
+from sgf_solver.storage import read_arrays, write_arrays
+
+if TYPE_CHECKING:
+    from sgf_solver.board import GoBoard
+
+NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+DIAMOND = ((-2, 0), (0, 2), (2, 0), (0, -2))
+
+EMPTY, OWN, OPPONENT, EDGE = range(4)
+# field of -1, 0 and 1 stones
+FIELDS = np.array([OPPONENT, EMPTY, OWN], dtype=np.uint32)
+# every 2-bit field set to 01
+LOW_BITS = 0x555555
+
+TABLE_CHUNK = 4096
+
+
+def _offsets(diamond: bool):
+    return NEIGHBOURS + DIAMOND if diamond else NEIGHBOURS
+
+
+def pattern_codes(positions: np.ndarray, diamond: bool = False) -> np.ndarray:
+    """ (N, 19, 19) pattern codes of positions where the side to move has 1 """
+    positions = np.asarray(positions).reshape((-1, *BOARD_SHAPE))
+    padded = np.full((len(positions), 23, 23), EDGE, dtype=np.uint32)
+    padded[:, 2:21, 2:21] = FIELDS[np.sign(positions).astype(np.intp) + 1]
+
+    codes = np.zeros(positions.shape, dtype=np.uint32)
+    for field, (dx, dy) in enumerate(_offsets(diamond)):
+        codes |= padded[:, 2 + dx:21 + dx, 2 + dy:21 + dy] << np.uint32(2 * field)
+
+    return codes
+
+
+def swap_colors(codes):
+    """ Codes seen by the other player, own and opponent fields are exchanged """
+    low = codes & LOW_BITS
+    high = (codes >> 1) & LOW_BITS
+    mixed = low ^ high
+    return codes ^ (mixed | mixed << 1)
+
+
+def _update_table(diamond: bool) -> list:
+    """ For every flat point: the flat points whose codes see it, their field masks and shifts """
+    if diamond not in _UPDATES:
+        table = []
+        for x, y in np.ndindex(*BOARD_SHAPE):
+            points, shifts = [], []
+            for field, (dx, dy) in enumerate(_offsets(diamond)):
+                if 0 <= x - dx < 19 and 0 <= y - dy < 19:
+                    points.append((x - dx) * 19 + y - dy)
+                    shifts.append(2 * field)
+
+            shifts = np.array(shifts, dtype=np.uint32)
+            table.append((np.array(points, dtype=np.intp), ~(np.uint32(3) << shifts), shifts))
+
+        _UPDATES[diamond] = table
+
+    return _UPDATES[diamond]
+
+
+_UPDATES = {}
+
+
+class PatternCodes:
+    """
+    Pattern codes of a board as black sees it, updated point by point.
+
+    Placing or removing a stone rewrites one field in the codes of each point
+    around it, a single fancy-indexed update per stone.
+    """
+
+    def __init__(self, position: np.ndarray, diamond: bool = False):
+        self.diamond = diamond
+        self.codes = pattern_codes(position, diamond)[0]
+        self._flat = self.codes.reshape(-1)
+        self._updates = _update_table(diamond)
+
+    def copy(self) -> 'PatternCodes':
+        copy = PatternCodes.__new__(PatternCodes)
+        copy.diamond, copy.codes, copy._updates = self.diamond, self.codes.copy(), self._updates
+        copy._flat = copy.codes.reshape(-1)
+        return copy
+
+    def set(self, coord: CoordType, color: Location):
+        """ Update the neighbour codes for a stone placed at or removed from coord """
+        points, masks, shifts = self._updates[coord[0] * 19 + coord[1]]
+        self._flat[points] = self._flat[points] & masks | FIELDS[int(color) + 1] << shifts
+
+    def sync(self, before: np.ndarray, after: np.ndarray):
+        """ Apply every change between two positions, a move with its captures """
+        for x, y in zip(*np.nonzero(before != after)):
+            self.set((int(x), int(y)), Location(int(after[x, y])))
+
+    def relative(self, turn: Location, points: tuple = None) -> np.ndarray:
+        """ Codes seen by the side to move, of the (xs, ys) points only if given """
+        codes = self.codes if points is None else self.codes[points]
+        return codes if turn == Location.BLACK else swap_colors(codes)
+
+
+class PatternTable:
+    """ Answer rate of every pattern seen in the samples it was learned from """
+
+    def __init__(self, codes: np.ndarray, priors: np.ndarray, default: float,
+                 diamond: bool = False):
+        self.codes = codes
+        self.priors = priors
+        self.default = default
+        self.diamond = diamond
+
+    def __len__(self):
+        return len(self.codes)
+
+    def lookup(self, codes: np.ndarray) -> np.ndarray:
+        """ Priors of codes, the default rate for unseen patterns """
+        if not len(self.codes):
+            return np.full(np.shape(codes), self.default, dtype=np.float32)
+
+        idx = np.minimum(np.searchsorted(self.codes, codes), len(self.codes) - 1)
+        return np.where(self.codes[idx] == codes, self.priors[idx], self.default)
+
+    @classmethod
+    def learn(cls, samples: Iterable[Tuple[np.ndarray, np.ndarray]], diamond: bool = False,
+              smoothing: float = PATTERN_SMOOTHING) -> 'PatternTable':
+        """ Table of (problems, answers) chunks, problems as the (N, 9, 19, 19) input planes """
+        counts: Dict[str, np.ndarray] = {'codes': np.zeros(0, dtype=np.uint32),
+                                         'seen': np.zeros(0), 'chosen': np.zeros(0)}
+
+        for problems, answers in samples:
+            problems = np.asarray(problems)
+            candidates = problems[:, -1] > 0
+            codes = pattern_codes(problems[:, 0], diamond)[candidates]
+            chosen = np.reshape(answers, problems[:, 0].shape)[candidates] > 0
+
+            merged, inverse = np.unique(np.concatenate([counts['codes'], codes]),
+                                        return_inverse=True)
+            old, new = inverse[:len(counts['codes'])], inverse[len(counts['codes']):]
+            counts = {
+                'codes': merged,
+                'seen': np.bincount(old, counts['seen'], len(merged)) +
+                np.bincount(new, minlength=len(merged)),
+                'chosen': np.bincount(old, counts['chosen'], len(merged)) +
+                np.bincount(new, chosen, len(merged)),
+            }
+
+        seen, chosen = counts['seen'], counts['chosen']
+        default = chosen.sum() / seen.sum() if seen.sum() else 1 / 361
+        priors = (chosen + smoothing * default) / (seen + smoothing)
+        return cls(counts['codes'], priors.astype(np.float32), float(default), diamond)
+
+    def save(self, path: str = PATTERN_TABLE):
+        write_arrays(path, {'codes': self.codes, 'priors': self.priors},
+                     {'default': self.default, 'diamond': self.diamond})
+
+    @classmethod
+    def load(cls, path: str = PATTERN_TABLE) -> 'PatternTable':
+        arrays, attrs = read_arrays(path, mmap=False)
+        return cls(arrays['codes'], arrays['priors'], attrs['default'], attrs['diamond'])
+
+
+class PatternModel:
+    """
+    Pattern priors and a neutral value, without the network.
+
+    As a TreeSearch evaluator it reads the codes every board keeps up to date through
+    its moves, predict is the network interface for stacks of input planes.
+    """
+
+    def __init__(self, table: PatternTable = None, value: float = 0.5):
+        self.table = table if table is not None else PatternTable.load()
+        self.value = value
+
+    def evaluate(self, board: 'GoBoard') -> Tuple[float, np.ndarray]:
+        codes = board.patterns(self.table.diamond).relative(board.turn)
+        policy = (self.table.lookup(codes) * board.legal_moves).ravel()
+        return self.value, policy / (policy.sum() or 1)
+
+    def predict(self, data):
+        planes = np.asarray(data[0] if isinstance(data, list) else data)
+        priors = self.table.lookup(pattern_codes(planes[:, 0], self.table.diamond))
+        policy = (priors * (planes[:, -1] > 0)).reshape((-1, 361))
+
+        totals = policy.sum(axis=1, keepdims=True)
+        policy = np.divide(policy, totals, out=np.zeros_like(policy), where=totals > 0)
+        return np.full((len(planes), 1), self.value), policy
+
+
+def dataset_samples(path: str) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+    """ (problems, answers) chunks of an h5 dataset """
+    import h5py
+
+    with h5py.File(path, 'r') as dataset:
+        for start in range(0, dataset['problems'].shape[0], TABLE_CHUNK):
+            yield (dataset['problems'][start:start + TABLE_CHUNK],
+                   dataset['answers'][start:start + TABLE_CHUNK])
+
+
+def sgf_samples(paths: Iterable[str]) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+    """ (problems, answers) of every SGF file, parsed without symmetric copies """
+    from sgf_solver.exceptions import ParserError
+    from sgf_solver.parser.parser import TsumegoParser
+
+    for path in paths:
+        try:
+            problems, _, answers = TsumegoParser(path).get_dataset(extend=False)
+        except ParserError:
+            continue
+
+        if len(problems):
+            yield problems, answers
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+    import time
+    from sgf_solver.constants import PROBLEM_DATASET
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    source = args[0] if args else PROBLEM_DATASET.format('small')
+
+    if os.path.isdir(source):
+        from sgf_solver.dataset.builder import find_sgf_files
+        samples = sgf_samples(find_sgf_files(source))
+    else:
+        samples = dataset_samples(source)
+
+    start = time.perf_counter()
+    table = PatternTable.learn(samples, diamond='--diamond' in sys.argv)
+    table.save()
+    print(f"{len(table)} patterns in {time.perf_counter() - start:.1f} s, "
+          f"average answer rate {table.default:.4f}")
@@ -1,42 +1,83 @@
 import os
-import h5py
-import numpy as np
+import time
 
-from sgf_solver.model import create_model
-from sgf_solver.constants import PROBLEM_DATASET, WEIGHTS_PATH, INPUT_DATA_SHAPE
+from sgf_solver.model.dataset import ProblemBatches, distill, prefetch
+from sgf_solver.model.model import create_model, load_model, weights_path
+from sgf_solver.constants import DEFAULT_CONFIG, PROBLEM_DATASET
+from sgf_solver.enums import Augmentation
 
 
-def load_problems():
-    with h5py.File(PROBLEM_DATASET.format('big'), 'r') as dataset:
-        problems = np.array(dataset['problems'], dtype=int)
-        values = np.array(dataset['values'], dtype=int)
-        answers = np.array(dataset['answers'], dtype=int)
+def _fit(model, path: str, epochs: int, batch_size: int, validation_split: float,
+         augment: Augmentation = None, teacher=None):
+    train, validation = ProblemBatches.split(path, batch_size, validation_split, augment=augment)
+    # the teacher predicts on the thread that runs the student, only reading is prefetched
+    batches = prefetch(train) if teacher is None else distill(prefetch(train), teacher)
 
-    np.random.seed(0)
-    count = problems.shape[0]
-    indices = np.arange(count)
-    np.random.shuffle(indices)
-    problems = problems.reshape((count, *INPUT_DATA_SHAPE))[indices]
-    values = values.reshape((count, 1))[indices]
-    answers = answers.reshape((count, 361))[indices]
+    start = time.time()
+    history = model.fit(batches,
+                        steps_per_epoch=len(train),
+                        epochs=epochs,
+                        validation_data=prefetch(validation),
+                        validation_steps=len(validation))
 
-    return problems, values, answers
+    return history, train.rows * epochs / (time.time() - start)
 
 
-def train_model(problems, values, answers):
-    model = create_model()
+def train_model(path: str = PROBLEM_DATASET.format('small'),
+                epochs: int = 1,
+                batch_size: int = 256,
+                validation_split: float = 0.2,
+                augment: Augmentation = Augmentation.RANDOM,
+                config: str = DEFAULT_CONFIG,
+                teacher: str = None):
+    """ Train the network of a size from MODEL_CONFIGS
 
-    if os.path.exists(WEIGHTS_PATH):
+    With a teacher config, the student learns from the outputs of the trained teacher
+    blended with the dataset labels, validation still uses the labels alone.
+    """
+    model = create_model(config=config)
+    path_weights = weights_path(config)
+
+    if os.path.exists(path_weights):
         print("Loading weights")
-        model.load_weights(WEIGHTS_PATH)
+        model.load_weights(path_weights)
+
+    teacher_model = None if teacher is None else load_model(config=teacher)
+    _fit(model, path, epochs, batch_size, validation_split, augment, teacher_model)
+
+    os.makedirs(os.path.dirname(path_weights), exist_ok=True)
+    model.save_weights(path_weights)
+
+
+def compare_augmentation(epochs: int = 1, batch_size: int = 256, validation_split: float = 0.2):
+    """ Train fresh models on the small dataset with augmentation and on the pre-extended one
 
-    model.fit(problems, [values, answers],
-              epochs=1,
-              batch_size=256,
-              validation_split=0.2)
-    model.save_weights(WEIGHTS_PATH)
+    Prints training throughput and final validation metrics of both runs. The big dataset
+    holds symmetric copies of its validation positions in the training blocks, so its
+    validation accuracy is optimistic.
+    """
+    runs = [
+        ('small, random symmetry', PROBLEM_DATASET.format('small'), Augmentation.RANDOM),
+        ('small, cycled symmetry', PROBLEM_DATASET.format('small'), Augmentation.CYCLE),
+        ('big, pre-extended', PROBLEM_DATASET.format('big'), None),
+    ]
+
+    for name, path, augment in runs:
+        model = create_model(summary=False)
+        history, rate = _fit(model, path, epochs, batch_size, validation_split, augment)
+
+        metrics = ', '.join(f'{key}: {values[-1]:.4f}'
+                            for key, values in history.history.items() if key.startswith('val_'))
+        print(f"{name}: {rate:.0f} samples/s, {metrics}")
 
 
 if __name__ == '__main__':
-    problems, values, answers = load_problems()
-    train_model(problems, values, answers)
+    import sys
+
+    def option(name: str):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else None
+
+    if '--compare' in sys.argv:
+        compare_augmentation()
+    else:
+        train_model(config=option('--config') or DEFAULT_CONFIG, teacher=option('--distill'))
@@ -1,30 +1,37 @@
 import os
+from typing import Iterator, Set, Tuple
 
-import h5py
 import numpy as np
 
 from sgf_solver.annotations import (
     CoordType,
     PositionType,
-    CollectionType,
-    NodeListType,
     DataCollectionType,
     DatasetType,
+    SampleType,
+    VariationType,
 )
 from sgf_solver.board import GoBoard
 from sgf_solver.constants import BOARD_SHAPE, PROBLEM_DATASET, PROBLEM_PATH
 from sgf_solver.enums import Location
 from sgf_solver.exceptions import ParserError
 from sgf_solver.parser.sgflib import GameTree, SGFParser
+from sgf_solver.symmetry import SYMMETRIES, transform
 
 
 class TsumegoParser:
     def __init__(self, path: str):
         self._path = path
         self._sgf = None
-        self._trees = None
         self._position = None
 
+    @classmethod
+    def from_string(cls, sgf_data: str) -> 'TsumegoParser':
+        """ Parser of SGF data already in memory """
+        parser = cls('<string>')
+        parser._sgf = SGFParser(sgf_data).parse()[0]
+        return parser
+
     def _parse_file(self) -> GameTree:
         if not os.path.exists(self._path):
             raise ParserError(f"File not found: {self._path}")
@@ -70,167 +77,137 @@ class TsumegoParser:
             self._position = self._get_position()
         return self._position
 
-    def _collect_trees(self, game_tree: GameTree) -> CollectionType:
-        if not game_tree.variations:
-            return [game_tree.data, ]
+    def _get_move(self, node, color: str) -> CoordType:
+        coord = self.get_coord(node.get(color).value)
 
-        trees = []
-        common_data = game_tree.data
-        for variation in game_tree.variations:
-            nested_trees = self._collect_trees(variation)
+        if not coord:
+            raise ParserError("No move in move node")
 
-            for nt in nested_trees:
-                trees.append(common_data + nt)
+        return coord
 
-        return trees
+    def _variations(self) -> Iterator[Tuple[VariationType, int]]:
+        """ Depth-first walk over the game tree on a single board
 
-    @staticmethod
-    def _sort_trees(trees: CollectionType) -> CollectionType:
-        correct, wrong = [], []
+        Yields the (board_data, move) pairs from the root to every leaf commented as
+        correct (value 1) or wrong (value 0). Moves are taken back on backtrack, so the
+        common prefix of variations is played once. The yielded list is reused.
+        """
+        board = GoBoard(self.position)
+        variation = []
+        stack = [(self.sgf, 1)]
 
-        for tree in trees:
-            comment = tree[-1].get('C')
-            if comment.value.startswith('Correct'):
-                correct.append(tree)
-            elif comment.value.startswith('Wrong'):
-                wrong.append(tree)
+        while stack:
+            game_tree, start = stack.pop()
 
-        return correct + wrong
+            if game_tree is None:
+                # all variations below are done, take back `start` moves
+                for _ in range(start):
+                    board.undo()
+                    variation.pop()
+                continue
 
-    @property
-    def trees(self) -> CollectionType:
-        if self._trees is None:
-            self._trees = self._sort_trees(self._collect_trees(self.sgf))
-        return self._trees
+            for node in game_tree[start:]:
+                coord = self._get_move(node, 'B' if len(variation) % 2 == 0 else 'W')
+                variation.append((board.board_data, coord))
+                board.move(coord)
 
-    def parse_tree(self, tree: NodeListType) -> DataCollectionType:
-        comment = tree[-1].get('C')
+            if game_tree.variations:
+                stack.append((None, len(game_tree) - start))
+                stack.extend((nested, 0) for nested in reversed(game_tree.variations))
+                continue
 
-        if comment.value.startswith('Correct'):
-            value = 1
-        elif comment.value.startswith('Wrong'):
-            value = 0
-        else:
-            return [], [], []
+            comment = game_tree[-1].get('C')
+            if comment and comment.value.startswith('Correct'):
+                yield variation, 1
+            elif comment and comment.value.startswith('Wrong'):
+                yield variation, 0
 
-        board = GoBoard(self.position)
+            stack.append((None, len(game_tree) - start))
 
-        tree_problems, tree_values, tree_answers = [], [], []
-        color = 'B'
-        for node in tree[1:]:
-            coord = self.get_coord(node.get(color).value)
-
-            if not coord:
-                raise ParserError("No move in move node")
+    @staticmethod
+    def _variation_samples(variation: VariationType, value: int) -> DataCollectionType:
+        problems, values, answers = [], [], []
 
-            # find the next move
+        for problem, coord in variation:
             answer = np.zeros(BOARD_SHAPE, dtype=int)
             answer[coord] = 1
 
-            # store problem, value and answers
-            tree_problems.append(board.board_data)
-            tree_answers.append(answer)
-            tree_values.append(value)
-
-            # make a move
-            board.move(coord)
+            problems.append(problem)
+            values.append(value)
+            answers.append(answer)
             value = 1 - value
-            color = 'B' if color == 'W' else 'W'
 
-        return tree_problems, tree_values, tree_answers
+        return problems, values, answers
 
     @staticmethod
     def flip_transpose(old_problems, old_values, old_answers) -> DataCollectionType:
         new_boards, new_values, new_answers = [], [], []
 
         for board, value, answer in zip(old_problems, old_values, old_answers):
-            new_boards.extend([
-                np.array(board),
-                np.flip(board, axis=(1,)),
-                np.flip(board, axis=(2,)),
-                np.flip(board, axis=(1, 2)),
-                np.transpose(board, axes=(0, 2, 1)),
-                np.transpose(np.flip(board, axis=(1,)), axes=(0, 2, 1)),
-                np.transpose(np.flip(board, axis=(2,)), axes=(0, 2, 1)),
-                np.transpose(np.flip(board, axis=(1, 2)), axes=(0, 2, 1)),
-            ])
-            new_values.extend([value, value, value, value, value, value, value, value])
-            new_answers.extend([
-                np.array(answer),
-                np.flip(answer, axis=(0,)),
-                np.flip(answer, axis=(1,)),
-                np.flip(answer, axis=(0, 1)),
-                np.transpose(answer),
-                np.transpose(np.flip(answer, axis=(0,))),
-                np.transpose(np.flip(answer, axis=(1,))),
-                np.transpose(np.flip(answer, axis=(0, 1))),
-            ])
+            new_boards.extend([transform(board, k) for k in range(SYMMETRIES)])
+            new_values.extend([value] * SYMMETRIES)
+            new_answers.extend([transform(answer, k) for k in range(SYMMETRIES)])
 
         return new_boards, new_values, new_answers
 
-    def get_dataset(self, extend: bool = True) -> DatasetType:
-        sgf_problems, sgf_values, sgf_answers = [], [], []
+    def samples(self, extend: bool = True) -> Iterator[SampleType]:
+        """ (problem, value, answer) samples of correct variations, then of wrong ones """
         correct_hashes = set()
+        wrong = []
+
+        for variation, value in self._variations():
+            if value == 1:
+                yield from self._merge_samples(variation, value, correct_hashes, extend)
+            else:
+                wrong.append(variation.copy())
 
-        for tree in self.trees:
-            hashes = []
-            tree_problems, tree_values, tree_answers = [], [], []
+        for variation in wrong:
+            yield from self._merge_samples(variation, 0, correct_hashes, extend)
 
-            for problem, value, answer in zip(*self.parse_tree(tree)):
-                # merge another answer to existing problems
-                problem_hash = hash(str(problem))
+    def _merge_samples(self, variation: VariationType, leaf_value: int, correct_hashes: Set[bytes],
+                       extend: bool) -> Iterator[SampleType]:
+        hashes = {}
+        tree_problems, tree_values, tree_answers = [], [], []
 
-                if value == 1:
-                    correct_hashes.add(problem_hash)
-                elif problem_hash in correct_hashes:
-                    continue
+        for problem, value, answer in zip(*self._variation_samples(variation, leaf_value)):
+            # merge another answer to existing problems
+            problem_hash = problem.tobytes()
 
-                if problem_hash in hashes:
-                    tree_answers[hashes.index(problem_hash)] += answer
-                    continue
+            if value == 1:
+                correct_hashes.add(problem_hash)
+            elif problem_hash in correct_hashes:
+                continue
 
-                hashes.append(problem_hash)
-                tree_problems.append(problem)
-                tree_values.append(value)
-                tree_answers.append(answer)
+            if problem_hash in hashes:
+                tree_answers[hashes[problem_hash]] += answer
+                continue
 
-            if extend:
-                tree_problems, tree_values, tree_answers = self.flip_transpose(
-                    tree_problems, tree_values, tree_answers)
+            hashes[problem_hash] = len(tree_problems)
+            tree_problems.append(problem)
+            tree_values.append(value)
+            tree_answers.append(answer)
 
-            sgf_problems.extend(tree_problems)
-            sgf_values.extend(tree_values)
-            sgf_answers.extend(tree_answers)
+        if extend:
+            tree_problems, tree_values, tree_answers = self.flip_transpose(
+                tree_problems, tree_values, tree_answers)
 
-        return np.array(sgf_problems), np.array(sgf_values), np.array(sgf_answers)
+        return zip(tree_problems, tree_values, tree_answers)
+
+    def get_dataset(self, extend: bool = True) -> DatasetType:
+        samples = list(self.samples(extend))
+
+        if not samples:
+            return np.array([]), np.array([]), np.array([])
+
+        return tuple(np.array(data) for data in zip(*samples))
 
 
 if __name__ == '__main__':
+    from sgf_solver.dataset.builder import build_dataset, find_sgf_files
+
     extend = False
-    all_sgf_files = []
-    for directory, _, files in os.walk(PROBLEM_PATH):
-        for filename in files:
-            if os.path.splitext(filename)[1] == '.sgf':
-                all_sgf_files.append(os.path.join(directory, filename))
-
-    all_problems, all_values, all_answers = [], [], []
-
-    good_count, bad_count = 0, 0
-    for filepath in sorted(all_sgf_files):
-        parser = TsumegoParser(filepath)
-        problems, values, answers = parser.get_dataset(extend)
-
-        all_problems.extend(problems)
-        all_values.extend(values)
-        all_answers.extend(answers)
-
-        good_count += sum(values)
-        bad_count += len(problems) - sum(values)
-        print(f"\rProblems created: {good_count + bad_count:-6d}, "
-              f"good: {good_count:-4d}, bad: {bad_count:-4d}", end='')
-    print()
-    with h5py.File(PROBLEM_DATASET.format('big' if extend else 'small'), 'w') as dataset:
-        dataset.create_dataset('problems', compression="gzip", data=np.array(all_problems))
-        dataset.create_dataset('values', compression="gzip", data=np.array(all_values))
-        dataset.create_dataset('answers', compression="gzip", data=np.array(all_answers))
-        dataset.close()
+    errors = build_dataset(find_sgf_files(PROBLEM_PATH),
+                           PROBLEM_DATASET.format('big' if extend else 'small'), extend)
+
+    for error in errors:
+        print(error)
@@ -6,37 +6,47 @@ version 1.0 (2017-12-22)
 Compatible with Python 3.6.3
 """
 
+import mmap
 import re
-from collections import UserList, OrderedDict
-
-reGameTreeStart = re.compile(r'\s*\(')
-reGameTreeEnd = re.compile(r'\s*\)')
-reGameTreeNext = re.compile(r'\s*([;()])')
-reNodeContents = re.compile(r'\s*([A-Za-z]+(?=\s*\[))')
-rePropertyStart = re.compile(r'\s*\[')
-rePropertyEnd = re.compile(r'\]')
-reEscape = re.compile(r'\\')
-reLineBreak = re.compile(r'\r\n?|\n\r?')  # CR, LF, CR/LF, LF/CR
+import sys
+from collections import UserList
+from operator import itemgetter
+
+# one token per match: a delimiter, a property label or a property value
+TOKEN_PATTERN = r"""\s*(?:
+    ([;()])                            # node start, variation start or end
+  | ([A-Za-z]+)\s*(?=\[)               # property label followed by a value
+  | \[([^\]\\]*(?:\\.[^\]\\]*)*)\]     # property value, may contain escaped characters
+)"""
+reToken = re.compile(TOKEN_PATTERN, re.VERBOSE | re.DOTALL)
+reTokenBytes = re.compile(TOKEN_PATTERN.encode(), re.VERBOSE | re.DOTALL)
+reDataEnd = re.compile(r'\s*\Z')
+reDataEndBytes = re.compile(rb'\s*\Z')
+reUnescape = re.compile(r'\\(?:\r\n?|\n\r?|(.))', re.DOTALL)  # escaped linebreaks are removed
 reCharsToEscape = re.compile(r'[]\\]')  # characters that need to be \escaped
 
+CONTROL_CHARS = str.maketrans("\000\001\002\003\004\005\006\007\010\011\013\014\016\017\020"
+                              "\021\022\023\024\025\026\027\030\031\032\033\034\035\036\037",
+                              " " * 30)
+
 
 class EndOfDataParseError(Exception):
-    """Raised by [SGFParser.parse_variations()], [SGFParser.parseNode()]."""
+    """Raised by [iter_events()]."""
     pass
 
 
 class GameTreeParseError(Exception):
-    """Raised by [SGFParser.parse_game_tree()]."""
+    """Raised by [iter_events()]."""
     pass
 
 
 class NodePropertyParseError(Exception):
-    """Raised by [SGFParser.parseNode()]."""
+    """Raised when a node property has no values."""
     pass
 
 
 class PropertyValueParseError(Exception):
-    """Raised by [SGFParser.parse_property_value()]."""
+    """Raised by [iter_events()]."""
     pass
 
 
@@ -52,24 +62,19 @@ class GameTreeEndError(Exception):
 
 def _escape_text(text: str):
     """Adds backslash-escapes to property value characters that need them."""
-    output = ""
-    index = 0
-    match = reCharsToEscape.search(text, index)
+    return reCharsToEscape.sub(r'\\\g<0>', text)
 
-    while match:
-        output = output + text[index:match.start()] + '\\' + text[match.start()]
-        index = match.end()
-        match = reCharsToEscape.search(text, index)
 
-    output = output + text[index:]
-    return output
+def _unescape_text(text: str):
+    """Removes backslash-escapes and escaped linebreaks from a raw property value."""
+    if '\\' not in text:
+        return text
+    return reUnescape.sub(lambda match: match.group(1) or '', text)
 
 
 def _convert_control_chars(text):
     """Converts control characters in [text] to spaces. Override for variant behaviour."""
-    return text.translate(
-        str.maketrans("\000\001\002\003\004\005\006\007\010\011\013\014\016\017\020"
-                      "\021\022\023\024\025\026\027\030\031\032\033\034\035\036\037", " " * 30))
+    return text.translate(CONTROL_CHARS)
 
 
 class Collection(UserList):
@@ -86,53 +91,94 @@ class Collection(UserList):
         return Cursor(self[index])
 
 
-class Property(UserList):
+class Property(tuple):
     """
-    An SGF property: a set of label and value(sgf_coord). Instance attributes:
-      - self[.data] : list of str -- property values.
-      - self.label : string -- SGF standard property label."""
+    An SGF property: a (label, values) pair. Instance attributes:
+      - self.label : string -- SGF standard property label, interned.
+      - self.data : tuple of str -- property values, empty values are dropped.
+      - self.value : str -- the first property value."""
 
-    def __init__(self, label: str, data: list):
-        self.label = label
-        self.data = data or []
-        super().__init__(initlist=self.data)
+    __slots__ = ()
 
-        while '' in self.data:
-            self.data.remove('')
+    def __new__(cls, label: str, data: list):
+        return super().__new__(cls, (sys.intern(label), tuple(x for x in data or () if x != '')))
 
     def __str__(self):
-        if not self.data:
+        if not self[1]:
             return ""
 
-        return f"{self.label}[{']['.join([_escape_text(x) for x in self])}]"
+        return f"{self[0]}[{']['.join([_escape_text(x) for x in self[1]])}]"
+
+    label = property(itemgetter(0))
+    data = property(itemgetter(1))
 
     @property
     def value(self):
-        return self.data[0]
+        return self[1][0]
 
 
-class Node(OrderedDict):
+class Node:
     """
-    An SGF node: a sequence of properties. Instance attributes:
-      - self[.data] : ordered dictionary -- list of [Property.label:Property] mapping.
+    An SGF node: a sequence of properties with read-only mapping access by label. Instance attributes:
+      - self.properties : tuple of [Property] -- in the order they were added, one per label.
     Properties *must* be added using [self.add_property()]."""
 
+    __slots__ = ('properties',)
+
     def __init__(self, pr_list: list = None):
-        if pr_list is None:
-            pr_list = []
+        self.properties = ()
 
-        for prop in pr_list:  # type: Property
+        for prop in pr_list or ():  # type: Property
             self.add_property(prop)
 
-        super().__init__()
-
     def __str__(self):
         """SGF representation of node. Has leading semicolon."""
-        return f";{''.join([str(self[x]) for x in self])}"
+        return f";{''.join([str(x) for x in self.properties])}"
+
+    def __repr__(self):
+        return f"Node({list(self.properties)!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.properties == other.properties
+
+    def __len__(self):
+        return len(self.properties)
+
+    def __iter__(self):
+        return (prop[0] for prop in self.properties)
+
+    def __contains__(self, label):
+        return self.get(label) is not None
+
+    def __getitem__(self, label: str):
+        prop = self.get(label)
+        if prop is None:
+            raise KeyError(label)
+        return prop
+
+    def get(self, label: str, default=None):
+        for prop in self.properties:
+            if prop[0] == label:
+                return prop
+        return default
+
+    def keys(self):
+        return [prop[0] for prop in self.properties]
+
+    def values(self):
+        return list(self.properties)
+
+    def items(self):
+        return [(prop[0], prop) for prop in self.properties]
 
     def add_property(self, prop: Property):
         if prop.data:
-            return self.setdefault(prop.label, prop)
+            existing = self.get(prop.label)
+            if existing is not None:
+                return existing
+
+            self.properties += (prop,)
+            return prop
 
 
 class GameTree(UserList):
@@ -178,155 +224,138 @@ class GameTree(UserList):
         self.append(node)
 
 
+START_TREE = 'start_tree'
+NODE = 'node'
+PROPERTY = 'property'
+END_TREE = 'end_tree'
+
+
+def iter_events(data, encoding: str = 'utf-8'):
+    """
+    Generates the parsing events of SGF [data] without building any tree:
+      - (START_TREE, None) : "(" of a game tree or variation.
+      - (NODE, None) : ";" of a new node in the current game tree.
+      - (PROPERTY, (label, values)) : property of the last node, values are unescaped.
+      - (END_TREE, None) : ")" of the current game tree or variation.
+    [data] is a str, or bytes-like (bytes, mmap) decoded with [encoding]. Parsing stops
+    at the end of data or at the first top level token that doesn't start a game tree.
+    Memory use depends on the nesting depth only.
+    Raises [GameTreeParseError], [PropertyValueParseError] and [EndOfDataParseError]."""
+
+    if isinstance(data, str):
+        token, data_end, delimiters = reToken, reDataEnd, '(;)'
+    else:
+        token, data_end, delimiters = reTokenBytes, reDataEndBytes, (b'(', b';', b')')
+
+    start_tree, start_node, end_tree = delimiters
+    index = 0
+    in_node = False
+    variations = []  # per open game tree: whether it already has variations
+
+    while True:
+        match = token.match(data, index)
+
+        if match is None:
+            if not variations:
+                return
+            if data_end.match(data, index):
+                raise EndOfDataParseError
+            raise GameTreeParseError("Invalid SGF file format.")
+
+        delimiter, label, _ = match.groups()
+        if not variations and delimiter != start_tree:
+            return
+        index = match.end()
+
+        if delimiter == start_node:
+            if variations[-1]:
+                raise GameTreeParseError("A node was encountered after a variation.")
+            in_node = True
+            yield NODE, None
+        elif delimiter == start_tree:
+            if variations:
+                variations[-1] = True
+            variations.append(False)
+            in_node = False
+            yield START_TREE, None
+        elif delimiter == end_tree:
+            variations.pop()
+            in_node = False
+            yield END_TREE, None
+        elif label is not None and in_node:
+            values = []
+            match = token.match(data, index)
+            while match and match.group(3) is not None:
+                index = match.end()
+                value = match.group(3)
+                if not isinstance(value, str):
+                    value = value.decode(encoding)
+                values.append(_convert_control_chars(_unescape_text(value)))
+                match = token.match(data, index)
+
+            if not values:
+                raise PropertyValueParseError
+            yield PROPERTY, (label if isinstance(label, str) else label.decode('ascii'), values)
+        else:
+            raise GameTreeParseError("Invalid SGF file format.")
+
+
+def build_game_trees(events):
+    """Builds [GameTree] objects from parsing [events], yields every top level game tree once it ends."""
+    stack = []
+    node = None
+
+    for event, data in events:
+        if event == PROPERTY:
+            node.add_property(Property(*data))
+        elif event == NODE:
+            node = Node()
+            stack[-1].append_node(node)
+        elif event == START_TREE:
+            stack.append(GameTree())
+        else:
+            game_tree = stack.pop()
+            if not game_tree:
+                continue
+            if stack:
+                stack[-1].variations.append(game_tree)
+            else:
+                yield game_tree
+
+
+def read_game_trees(path: str, encoding: str = 'utf-8'):
+    """Yields the game trees of an SGF file one by one, the file is memory-mapped instead of read."""
+    with open(path, 'rb') as file:
+        if not file.seek(0, 2):
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from build_game_trees(iter_events(data, encoding))
+
+
 class SGFParser:
     """
     Parser for SGF data. Creates a tree structure based on the SGF standard itself.
-    [SGFParser.parse()] will return a [Collection] object for the entire data.
-    Instance attributes:
-      - self.data : string -- the complete SGF data instance.
-      - self.data_len : integer -- length of [self.data].
-      - self.index : integer -- current parsing position in [self.data]."""
+    [SGFParser.parse()] will return a [Collection] object for the entire data,
+    [SGFParser.game_trees()] yields its game trees one at a time. Instance attributes:
+      - self.data : string or bytes-like -- the complete SGF data instance.
+      - self.encoding : string -- encoding of property values in bytes-like data."""
 
-    def __init__(self, data: str):
+    def __init__(self, data, encoding: str = 'utf-8'):
         self.data = data
-        self.data_len = len(data)
-        self.index = 0
+        self.encoding = encoding
 
-    def _match_regex(self, regex):
-        return regex.match(self.data, self.index)
+    def events(self):
+        """Returns the [iter_events()] generator for [self.data]."""
+        return iter_events(self.data, self.encoding)
 
-    def _search_regex(self, regex):
-        return regex.search(self.data, self.index)
+    def game_trees(self):
+        """Yields every [GameTree] of [self.data] as soon as it's parsed."""
+        return build_game_trees(self.events())
 
     def parse(self):
         """Parses the SGF data stored in [self.data], and returns a [Collection]."""
-        collection = Collection()
-        while self.index < self.data_len:
-            sgf_game = self.parse_one_game()
-            if sgf_game:
-                collection.append(sgf_game)
-            else:
-                break
-        return collection
-
-    def parse_one_game(self):
-        """
-        Parses one game from [self.data]. Returns a [GameTree] containing one game.
-        Returns [None] if the end of [self.data] has been reached."""
-
-        if self.index < self.data_len:
-            match = self._match_regex(reGameTreeStart)
-            if match:
-                self.index = match.end()
-                return self.parse_game_tree()
-        return None
-
-    def parse_game_tree(self):
-        """
-        Called when "(" encountered, ends when a matching ")" encountered.
-        Parses and returns one [GameTree] from [self.data].
-        Raises [GameTreeParseError] if a problem is encountered."""
-
-        game_tree = GameTree()
-        while self.index < self.data_len:
-            match = self._match_regex(reGameTreeNext)
-            if match:
-                self.index = match.end()
-                if match.group(1) == ";":  # Start of a node
-                    if game_tree.variations:
-                        raise GameTreeParseError("A node was encountered after a variation.")
-                    game_tree.append(self.parse_node())
-                elif match.group(1) == "(":  # Start of variation
-                    game_tree.variations = self.parse_variations()
-                else:  # End of GameTree ")"
-                    return game_tree
-            else:
-                raise GameTreeParseError("Invalid SGF file format.")
-        return game_tree
-
-    def parse_variations(self):
-        """
-        Called when "(" encountered inside a [GameTree], ends when a non-matching ")" encountered.
-        Returns a list of variation [GameTree].
-        Raises [EndOfDataParseError] if the end of [self.data] is reached before the end of the enclosing [GameTree]."""
-
-        variations = []
-        while self.index < self.data_len:
-            match = self._match_regex(
-                reGameTreeEnd)  # Check for ")" at end of GameTree, but don't consume it
-            if match:
-                return variations
-            game_tree = self.parse_game_tree()
-            if game_tree:
-                variations.append(game_tree)
-            match = self._match_regex(reGameTreeStart)  # Check for next variation, and consume "("
-            if match:
-                self.index = match.end()
-        raise EndOfDataParseError
-
-    def parse_node(self):
-        """
-        Called when ";" encountered (& is consumed). Parses and returns one [Node], which can be empty.
-        Raises [NodePropertyParseError] if no property values are extracted.
-        Raises [EndOfDataParseError] if the end of [self.data] is reached before the end of the node (i.e., the start
-        of the next node, the start of a variation, or the end of the enclosing game tree)."""
-
-        node = Node()
-        while self.index < self.data_len:
-            match = self._match_regex(reNodeContents)
-            if match:
-                self.index = match.end()
-                pv_list = self.parse_property_value()
-                if pv_list:
-                    prop = Property(match.group(1), pv_list)
-                    node.add_property(prop)
-                else:
-                    raise NodePropertyParseError
-            else:  # End of Node
-                return node
-        raise EndOfDataParseError
-
-    def parse_property_value(self):
-        """
-        Called when "[" encountered (but not consumed), ends when the next property, node, or variation encountered.
-        Parses and returns a list of property values. Raises [PropertyValueParseError] if there is a problem."""
-
-        pv_list = []
-        while self.index < self.data_len:
-            match = self._match_regex(rePropertyStart)
-            if match:
-                self.index = match.end()
-                value = ""
-                match_end = self._search_regex(rePropertyEnd)
-                match_escape = self._search_regex(reEscape)
-
-                # Scan for escaped characters (using '\'), unescape them (remove linebreaks)
-                while match_escape and match_end and (match_escape.end() < match_end.end()):
-                    # Copy everything up to '\', but remove '\'
-                    value = value + self.data[self.index:match_escape.start()]
-                    match_break = reLineBreak.match(self.data, match_escape.end())
-                    if match_break:
-                        # Skip linebreak
-                        self.index = match_break.end()
-                    else:
-                        # Copy escaped character and move to point after it
-                        value = value + self.data[match_escape.end()]
-                        self.index = match_escape.end() + 1
-                    match_end = self._search_regex(rePropertyEnd)
-                    match_escape = self._search_regex(reEscape)
-                if match_end:
-                    value = value + self.data[self.index:match_end.start()]
-                    self.index = match_end.end()
-                    pv_list.append(_convert_control_chars(value))
-                else:
-                    raise PropertyValueParseError
-            else:  # End of Property
-                break
-
-        if len(pv_list):
-            return pv_list
-        else:
-            raise PropertyValueParseError
+        return Collection(list(self.game_trees()))
 
 
 class Cursor:
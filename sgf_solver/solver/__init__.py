@@ -1,2 +1,5 @@
 from .mcts import TreeSearch
 from .node import Node
+from .checkpoint import save_tree, load_tree
+from .cache import SolutionCache
+from .evaluators import ModelEvaluator, PlayoutEvaluator
@@ -0,0 +1,151 @@
+"""
+Persistent cache of solved positions in a local SQLite file.
+
+Positions are stored relative to the side to move and in their canonical symmetry,
+so a problem rotated, mirrored or with swapped colours hits the same entry. The key
+is the canonical position together with the target stones and the region, and
+whether the side to move is the defender, which is the problem class seen by the
+mover. Answers are stored in the canonical frame and mapped back through the
+inverse transform on lookup.
+
+Boards with history are neither looked up nor stored: their ko bans are not part of
+the key.
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from sgf_solver.annotations import CoordType
+from sgf_solver.board.tsumego import TsumegoBoard
+from sgf_solver.constants import CACHE_ENTRIES, SOLUTION_CACHE
+from sgf_solver.enums import Location, ProblemClass
+from sgf_solver.symmetry import canonical_symmetry, transform_coord
+
+CACHE_VERSION = 2
+
+SolutionType = Tuple[List[CoordType], float, bool]
+
+
+def solution_key(board: TsumegoBoard) -> Tuple[bytes, bool, int]:
+    """ Canonical position of the mover with the targets and region, whether the mover
+    defends, and the transform used """
+    problem = np.stack([board.board * board.turn, board.stones, board.region]).astype(np.int8)
+    k, canonical = canonical_symmetry(problem)
+    defends = (board.problem == ProblemClass.LIVE) == (board.turn == Location.BLACK)
+    return canonical.tobytes(), defends, k
+
+
+def cacheable(board: TsumegoBoard) -> bool:
+    """ Whether the position alone determines the solution, without a ko ban from history """
+    return not board.history
+
+
+class SolutionCache:
+    """
+    Solutions keyed by position with the search budget that produced them.
+
+    A stored solution answers a lookup if its budget is at least the requested one, and
+    is only replaced by a solution with a larger budget. The least recently used entries
+    are evicted above max_entries.
+    """
+
+    def __init__(self, path: str = SOLUTION_CACHE, max_entries: int = CACHE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            version, = self._connection.execute('PRAGMA user_version').fetchone()
+            if version != CACHE_VERSION:
+                self._connection.execute('DROP TABLE IF EXISTS solutions')
+                self._connection.execute(f'PRAGMA user_version = {CACHE_VERSION}')
+
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS solutions ('
+                'position BLOB NOT NULL, defends INTEGER NOT NULL, moves TEXT NOT NULL, '
+                'value REAL NOT NULL, budget INTEGER NOT NULL, decided INTEGER NOT NULL, '
+                'used REAL NOT NULL, PRIMARY KEY (position, defends))')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)')
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def stats(self) -> dict:
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate}
+
+    def get(self, board: TsumegoBoard, budget: int = 0) -> Optional[SolutionType]:
+        """ Moves, value for the side to move and whether the moves reach a decided position """
+        if not cacheable(board):
+            return None
+
+        position, defends, k = solution_key(board)
+
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT moves, value, budget, decided FROM solutions '
+                'WHERE position = ? AND defends = ?', (position, defends)).fetchone()
+
+            if row is None or row[2] < budget:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._connection.execute(
+                'UPDATE solutions SET used = ? WHERE position = ? AND defends = ?',
+                (time.time(), position, defends))
+
+        moves = [transform_coord(divmod(idx, 19), k, inverse=True) for idx in json.loads(row[0])]
+        return moves, row[1], bool(row[3])
+
+    def put(self, board: TsumegoBoard, moves: List[CoordType], value: float, budget: int,
+            decided: bool = False):
+        """ Store a solution unless one with a larger budget is already stored """
+        if not cacheable(board):
+            return
+
+        position, defends, k = solution_key(board)
+        canonical_moves = [x * 19 + y for x, y in (transform_coord(move, k) for move in moves)]
+
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT budget FROM solutions WHERE position = ? AND defends = ?',
+                (position, defends)).fetchone()
+
+            if row is not None and row[0] > budget:
+                return
+
+            self._connection.execute(
+                'INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (position, defends, json.dumps(canonical_moves), float(value), int(budget),
+                 bool(decided), time.time()))
+
+            excess = self._connection.execute(
+                'SELECT COUNT(*) FROM solutions').fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._connection.execute(
+                    'DELETE FROM solutions WHERE rowid IN '
+                    '(SELECT rowid FROM solutions ORDER BY used, rowid LIMIT ?)', (excess,))
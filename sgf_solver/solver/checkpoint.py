@@ -0,0 +1,122 @@
+"""
+Search tree checkpoints.
+
+The tree is flattened in breadth-first order into parallel arrays (parent index,
+move, statistics, cached network output) and written with ``sgf_solver.storage``.
+Only the root position is stored, every other board is replayed lazily from its
+parent when the search first descends into it.
+"""
+from typing import Tuple
+
+import numpy as np
+
+from sgf_solver.board.tsumego import TsumegoBoard
+from sgf_solver.enums import Location, ProblemClass
+from sgf_solver.solver.node import Node
+from sgf_solver.storage import write_arrays, read_arrays
+
+CHECKPOINT_VERSION = 1
+
+
+def _board_arrays(board: TsumegoBoard):
+    history = board.history
+
+    arrays = {
+        'board': np.array(board.board, dtype=np.int8),
+        'stones': np.array(board.stones, dtype=np.int8),
+        'region': board.region,
+        'history_boards': np.array([h[0] for h in history], dtype=np.int8).reshape((-1, 19, 19)),
+        'history_turns': np.array([h[1] for h in history], dtype=np.int8),
+        'history_scores': np.array([[h[2][Location.BLACK], h[2][Location.WHITE]]
+                                    for h in history], dtype=np.int32).reshape((-1, 2)),
+    }
+    _, turn, score = board.state
+    attrs = {
+        'problem': board.problem.value,
+        'turn': int(turn),
+        'score': [score[Location.BLACK], score[Location.WHITE]],
+    }
+    return arrays, attrs
+
+
+def _score(black: int, white: int):
+    return {Location.BLACK: int(black), Location.WHITE: int(white)}
+
+
+def _load_board(arrays, attrs) -> TsumegoBoard:
+    history = [
+        (np.array(board, dtype=int), Location(int(turn)), _score(*score))
+        for board, turn, score in zip(arrays['history_boards'], arrays['history_turns'],
+                                      arrays['history_scores'])
+    ]
+    return TsumegoBoard(ProblemClass(attrs['problem']),
+                        np.array(arrays['stones'], dtype=int),
+                        np.array(arrays['region'], dtype=bool),
+                        board=arrays['board'],
+                        turn=Location(attrs['turn']),
+                        score=_score(*attrs['score']),
+                        history=history)
+
+
+def save_tree(path: str, root: Node, **attrs):
+    nodes, parents, moves = [root], [-1], [-1]
+
+    for idx, node in enumerate(nodes):
+        for move, child in node._children.items():
+            nodes.append(child)
+            parents.append(idx)
+            moves.append(move)
+
+    offsets = [0]
+    for node in nodes:
+        offsets.append(offsets[-1] + (len(node._moves) if node.evaluated else 0))
+
+    evaluated = [node for node in nodes if node.evaluated]
+    arrays = {
+        'parents': np.array(parents, dtype=np.int32),
+        'moves': np.array(moves, dtype=np.int16),
+        'visits': np.array([node.N for node in nodes], dtype=np.int32),
+        'values': np.array([node.W for node in nodes], dtype=np.float64),
+        'prior_values': np.array([np.nan if node._prior_value is None else node._prior_value
+                                  for node in nodes], dtype=np.float32),
+        'evaluated': np.array([node.evaluated for node in nodes], dtype=bool),
+        'offsets': np.array(offsets, dtype=np.int64),
+        'candidates': np.concatenate([np.array(node._moves, dtype=np.int16)
+                                      for node in evaluated] or [np.zeros(0, dtype=np.int16)]),
+        'priors': np.concatenate([np.array(node._priors, dtype=np.float32)
+                                  for node in evaluated] or [np.zeros(0, dtype=np.float32)]),
+    }
+
+    board_arrays, board_attrs = _board_arrays(root.board)
+    arrays.update({f'root_{name}': array for name, array in board_arrays.items()})
+
+    write_arrays(path, arrays, {'version': CHECKPOINT_VERSION, 'root': board_attrs, **attrs})
+
+
+def load_tree(path: str) -> Tuple[Node, dict]:
+    """ Root of a stored tree and the attributes it was saved with """
+    arrays, attrs = read_arrays(path)
+
+    board_arrays = {name[5:]: array for name, array in arrays.items() if name.startswith('root_')}
+    nodes = [Node(_load_board(board_arrays, attrs['root']))]
+
+    for parent_idx, move in zip(arrays['parents'][1:].tolist(), arrays['moves'][1:].tolist()):
+        parent = nodes[parent_idx]
+        node = Node(parent=parent, move=move)
+        parent._children[move] = node
+        nodes.append(node)
+
+    candidates, priors, offsets = arrays['candidates'], arrays['priors'], arrays['offsets'].tolist()
+    stats = zip(nodes, arrays['visits'].tolist(), arrays['values'].tolist(),
+                arrays['prior_values'].tolist(), arrays['evaluated'].tolist(),
+                offsets[:-1], offsets[1:])
+
+    for node, visits, value, prior_value, evaluated, start, stop in stats:
+        node._visits, node._value = visits, value
+
+        if evaluated:
+            node._prior_value = prior_value
+            node._moves = candidates[start:stop]
+            node._priors = priors[start:stop]
+
+    return nodes[0], attrs
@@ -0,0 +1,160 @@
+"""
+Leaf evaluators for TreeSearch.
+
+An evaluator turns a position into the value for the player to move and a
+policy over the 361 points, ``Node.evaluate`` masks the policy with the moves to
+consider. ``ModelEvaluator`` asks the network (or anything with its predict
+interface), ``PlayoutEvaluator`` plays random games out on a FastBoard and needs
+no model at all. ``PatternModel`` evaluates boards from their pattern codes.
+"""
+import random
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+import numpy as np
+
+from sgf_solver.annotations import CoordType
+from sgf_solver.board.fast import STRIDE, FastBoard, point
+from sgf_solver.board.tsumego import TsumegoBoard
+from sgf_solver.constants import PLAYOUT_LENGTH, PLAYOUTS
+from sgf_solver.enums import Location, ProblemClass
+from sgf_solver.model.patterns import PatternCodes, PatternModel, PatternTable
+
+if TYPE_CHECKING:
+    from keras.models import Model
+
+EvaluationType = Tuple[float, np.ndarray]
+
+
+def ko_point(board: TsumegoBoard) -> Optional[CoordType]:
+    """ Single stone captured by the last move that may not be retaken right away """
+    history = board.history
+    if not history:
+        return None
+
+    position = board.board
+    captured = np.argwhere((history[-1][0] != 0) & (position == 0))
+    if len(captured) != 1:
+        return None
+
+    coord = tuple(int(xy) for xy in captured[0])
+    return None if board.legal_moves[coord] else coord
+
+
+class ModelEvaluator:
+
+    def __init__(self, model: 'Model'):
+        self.model = model
+
+    def evaluate(self, board: TsumegoBoard) -> EvaluationType:
+        value, policy = self.model.predict([[board.board_data]])
+        return value.item(), policy.reshape(-1)
+
+
+class PlayoutEvaluator:
+    """
+    Share of random playouts won by the player to move.
+
+    Playouts are played on the framed problem, inside the region and the empty line
+    around it, and never fill a player's own one-point eyes. A playout ends when the
+    target stones are captured, which the attacker wins, or after two passes, when
+    the surviving targets live. Playouts longer than PLAYOUT_LENGTH times the area
+    count as a draw. A simple ko ban of the position holds for the first playout move.
+    With a pattern table, moves are drawn by their pattern priors, read from codes the
+    FastBoard updates with its moves, and the priors also serve as the policy,
+    otherwise both are uniform.
+    """
+
+    def __init__(self, playouts: int = PLAYOUTS, patterns: PatternTable = None,
+                 seed: int = None):
+        self.playouts = playouts
+        self.patterns = patterns
+        self.random = random.Random(seed)
+
+        self.games = 0
+        self.moves = 0
+
+    def _area(self, board: TsumegoBoard) -> np.ndarray:
+        area = board.region.copy()
+        area[1:] |= board.region[:-1]
+        area[:-1] |= board.region[1:]
+        area[:, 1:] |= board.region[:, :-1]
+        area[:, :-1] |= board.region[:, 1:]
+        return area
+
+    def _weights(self, fast: FastBoard, candidates: list) -> list:
+        xs, ys = np.divmod(np.array(candidates), STRIDE)
+        return self.patterns.lookup(fast.patterns.relative(fast.turn, (xs - 1, ys - 1))).tolist()
+
+    def _playout(self, fast: FastBoard, area: list, targets: list, defender: int,
+                 length: int) -> float:
+        """ 1 if the defender lives, 0 if the targets are captured, 0.5 for a draw """
+        passes = 0
+
+        for _ in range(length):
+            if passes == 2:
+                return 1.0
+
+            color = fast.turn
+            candidates = [idx for idx in area
+                          if fast.cells[idx] == 0 and not fast.is_eye(idx, color)]
+            weights = None
+            if self.patterns is not None and candidates:
+                weights = self._weights(fast, candidates)
+
+            while candidates:
+                if weights is None:
+                    choice = self.random.randrange(len(candidates))
+                else:
+                    choice = self.random.choices(range(len(candidates)), weights)[0]
+                    weights[choice] = weights[-1]
+                    weights.pop()
+
+                idx = candidates[choice]
+                candidates[choice] = candidates[-1]
+                candidates.pop()
+
+                if fast.play(idx):
+                    self.moves += 1
+                    break
+            else:
+                fast.make_pass()
+                passes += 1
+                continue
+
+            passes = 0
+            if color != defender and not fast.count(targets, defender):
+                return 0.0
+
+        return 0.5
+
+    def evaluate(self, board: TsumegoBoard) -> EvaluationType:
+        defender = Location.BLACK if board.problem == ProblemClass.LIVE else Location.WHITE
+        area_mask = self._area(board)
+        area = [point(coord) for coord in zip(*np.nonzero(area_mask))]
+        targets = [point(coord) for coord in zip(*np.nonzero(board.stones))]
+
+        framed = board.framed().board
+        codes = PatternCodes(framed, self.patterns.diamond) if self.patterns is not None else None
+        fast = FastBoard(framed, board.turn, ko_point(board), codes)
+        length = PLAYOUT_LENGTH * len(area)
+
+        lives = 0.0
+        for _ in range(self.playouts):
+            mark = fast.mark()
+            lives += self._playout(fast, area, targets, int(defender), length)
+            fast.undo(mark)
+
+        self.games += self.playouts
+        lives /= self.playouts
+        value = lives if board.turn == defender else 1 - lives
+
+        if self.patterns is None:
+            policy = area_mask.astype(float).ravel()
+        else:
+            codes = board.patterns(self.patterns.diamond).relative(board.turn)
+            policy = (self.patterns.lookup(codes) * area_mask).ravel()
+
+        return value, policy / (policy.sum() or 1)
+
+
+Evaluator = Union[ModelEvaluator, PlayoutEvaluator, PatternModel]
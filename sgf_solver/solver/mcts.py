@@ -1,42 +1,127 @@
-from keras.models import Model
+from typing import TYPE_CHECKING, Tuple
 
-from sgf_solver.board.tsumego import TsumegoBoard
+import numpy as np
+
+from sgf_solver.annotations import CoordType
+from sgf_solver.constants import C_PUCT, PRUNE_TARGET
+from sgf_solver.solver.checkpoint import save_tree, load_tree
+from sgf_solver.solver.evaluators import ModelEvaluator
 from sgf_solver.solver.node import Node
 
+if TYPE_CHECKING:
+    from keras.models import Model
+    from sgf_solver.solver.cache import SolutionCache, SolutionType
+    from sgf_solver.solver.evaluators import Evaluator
+
 
 class TreeSearch:
 
-    def __init__(self, model: Model):
-        self.children = dict()
+    def __init__(self, model: 'Model' = None, c_puct: float = C_PUCT, max_nodes: int = None,
+                 verbose: bool = True, evaluator: 'Evaluator' = None):
+        """ Leaves are evaluated by the evaluator, or by the model if none is given """
         self.model = model
+        self.evaluator = evaluator if evaluator is not None else ModelEvaluator(model)
+        self.c_puct = c_puct
+        self.max_nodes = max_nodes
+        self.verbose = verbose
+
+        self.nodes = 0
+        self.prunings = 0
+        self.reclaimed = 0
 
     def rollout(self, node: Node, times: int = 1):
+        self.nodes = node.subtree_size()
+
         for i in range(times):
-            print(f'\rRollout: {i}', end='')
+            if self.verbose:
+                print(f'\rRollout: {i}', end='')
             path = self._select(node)
             parent, leaf = path[-2:]
             reward = self._expand_and_evaluate(parent, leaf)
             self._backup(path, reward)
 
+            if self.max_nodes and self.nodes > self.max_nodes:
+                self.prune(node)
+
+    def solve(self, root: Node, times: int, cache: 'SolutionCache' = None) -> 'SolutionType':
+        """ Best variation from root, its value for the player to move and whether it ends in a
+        decided position, won or lost
+
+        With a cache, a solution found with at least `times` rollouts is returned instead of
+        searching, and new solutions are stored.
+        """
+        if cache is not None:
+            solution = cache.get(root.board, times)
+            if solution is not None:
+                return solution
+
+        self.rollout(root, times)
+        moves = root.perfect_variation()
+
+        node = root
+        for coord in moves:
+            node = node.child(coord)
+        decided = node.outcome() is not None
+
+        if cache is not None:
+            cache.put(root.board, moves, root.Q, times, decided)
+
+        return moves, root.Q, decided
+
+    def advance(self, node: Node, coord: CoordType) -> Node:
+        """ Re-root the search at the child for coord
+
+        The child keeps its subtree and statistics, the rest of the tree below node is released.
+        """
+        child = node.child(coord)
+        child.board  # replay the position before the parent is released
+        node._children.clear()
+
+        self.nodes = child.subtree_size()
+        return child
+
+    def prune(self, root: Node) -> int:
+        """ Drop the least visited subtrees until PRUNE_TARGET of max_nodes is left """
+        visits, unexplored = [], list(root._children.values())
+        while unexplored:
+            node = unexplored.pop()
+            visits.append(node.N)
+            unexplored.extend(node._children.values())
+
+        excess = len(visits) + 1 - int(self.max_nodes * PRUNE_TARGET)
+        if excess <= 0:
+            return 0
+
+        # subtrees rooted at nodes with N <= threshold hold every node with N <= threshold
+        threshold = np.partition(visits, excess - 1)[excess - 1]
+        reclaimed = root.prune(threshold)
+
+        self.nodes = len(visits) + 1 - reclaimed
+        self.prunings += 1
+        self.reclaimed += reclaimed
+        return reclaimed
+
     def _select(self, node: Node):
         path = [None, ]
         while True:
             path.append(node)
 
-            if node not in self.children or node.board.solved() is not None:
+            if not node.evaluated or node.outcome() is not None:
                 return path
 
-            node = node.next_child()
+            child = node.next_child(self.c_puct)
+            if child is None:
+                return path
 
-    def _expand_and_evaluate(self, parent: Node, leaf: Node):
-        """Add root to children nodes and return reward"""
-        leaf.evaluate(self.model)
+            node = child
 
-        if parent:
-            self.children[parent].add(leaf)
+    def _expand_and_evaluate(self, parent: Node, leaf: Node):
+        """Evaluate a new leaf and return reward, decided leaves skip the model"""
+        if leaf.N == 0:
+            self.nodes += parent is not None
 
-        if leaf not in self.children:
-            self.children[leaf] = set()
+        if not leaf.evaluated and leaf.outcome() is None:
+            leaf.evaluate(self.evaluator)
 
         return leaf.reward()
 
@@ -46,26 +131,46 @@ class TreeSearch:
             node.add_value(reward)
             reward = 1-reward
 
+    def save(self, path: str, root: Node):
+        """ Store the tree below root to continue the search later """
+        save_tree(path, root, c_puct=self.c_puct)
+
+    @classmethod
+    def load(cls, path: str, model: 'Model' = None, **kwargs) -> Tuple['TreeSearch', Node]:
+        """ Search with the stored c_puct and the root of the stored tree, rollouts continue
+        from its statistics """
+        root, attrs = load_tree(path)
+        kwargs.setdefault('c_puct', attrs.get('c_puct', C_PUCT))
+        return cls(model, **kwargs), root
+
 
 if __name__ == '__main__':
     import os
-    from sgf_solver.model.model import create_model
-    from utils import get_problems, print_from_collection
-    from sgf_solver.constants import WEIGHTS_PATH
-    model = create_model()
-
-    if not os.path.exists(WEIGHTS_PATH):
-        print("No weights found:", WEIGHTS_PATH)
+    import sys
+    from sgf_solver.model.model import create_model, weights_path
+    from sgf_solver.dataset import ProblemStore
+    from utils import print_problem
+    from sgf_solver.constants import DEFAULT_CONFIG, PROBLEM_DATASET
+
+    # python -m sgf_solver.solver.mcts [config] [row] [dataset]
+    args = sys.argv[1:] + [None] * 3
+    config = args[0] or DEFAULT_CONFIG
+    row = int(args[1] or 33333)
+    path = args[2] or PROBLEM_DATASET.format('big')
+    model = create_model(config=config)
+
+    if not os.path.exists(weights_path(config)):
+        print("No weights found:", weights_path(config))
         exit(1)
 
-    model.load_weights(WEIGHTS_PATH)
+    model.load_weights(weights_path(config))
 
     tree = TreeSearch(model)
 
-    probs = get_problems()
-    print_from_collection(probs, 33333)
-    prob = probs['problems'][33333]
-    board = TsumegoBoard(board=prob[0])
+    store = ProblemStore(path)
+    problem, _, answers = store[row]
+    print_problem(problem[0], answers)
+    board = store.board(row)
     print(board.problem)
     node = Node(board)
 
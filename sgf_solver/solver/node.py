@@ -1,22 +1,60 @@
+from math import ceil, sqrt
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
 import numpy as np
-from keras.models import Model
 
+from sgf_solver.annotations import CoordType
+from sgf_solver.board.tactics import read_targets
 from sgf_solver.board.tsumego import TsumegoBoard
+from sgf_solver.constants import C_PUCT, WIDENING_BASE, WIDENING_EXPONENT
+from sgf_solver.enums import Location
+from sgf_solver.exceptions import IllegalMoveError
+
+if TYPE_CHECKING:
+    from sgf_solver.solver.evaluators import Evaluator
+
+
+# outcome not computed yet, None is a computed open position
+UNDECIDED = object()
 
 
 class Node:
-    def __init__(self, board: TsumegoBoard):
-        self._value = None
-        self._policy = None
-        self._children = np.zeros(361, dtype=Node)
-        self.board = board
+    def __init__(self, board: TsumegoBoard = None, parent: 'Node' = None, move: int = None):
+        self._value = 0
+        self._visits = 0
+        self._prior_value = None
+        self._moves = None
+        self._priors = None
+        self._children: Dict[int, Node] = {}
+        self._board = board
+        self._parent = parent
+        self._move = move
+        self._outcome = UNDECIDED
 
     def __hash__(self):
         return hash(str(self.board.board_data))
 
+    @property
+    def board(self) -> TsumegoBoard:
+        """ Position of the node, replayed from the parent on first access """
+        if self._board is None:
+            board = self._parent.board.copy()
+            board.move(divmod(self._move, 19))
+            self._board, self._parent = board, None
+
+        return self._board
+
     @property
     def visits(self):
-        return np.array([(child.N if child else 0) for child in self._children])
+        visits = np.zeros(361, dtype=int)
+        for idx, child in self._children.items():
+            visits[idx] = child.N
+
+        return visits
+
+    @property
+    def evaluated(self) -> bool:
+        return self._moves is not None
 
     @property
     def W(self):
@@ -24,41 +62,121 @@ class Node:
 
     @property
     def N(self):
-        return sum([child.N for child in self._children if child]) + 1
+        return self._visits
 
     @property
     def Q(self):
-        return self.W / self.N
+        """ Average reward for the player to move """
+        return self.W / self.N if self.N else 0
+
+    def _width(self) -> int:
+        """ Amount of best prior moves eligible for selection, grows with visits """
+        return min(len(self._moves), ceil(WIDENING_BASE * (self.N + 1) ** WIDENING_EXPONENT))
+
+    def next_child(self, c_puct: float = C_PUCT) -> Optional['Node']:
+        """ Child with the highest PUCT score among the widened moves
+
+        Scores are from the point of view of the player to move here,
+        so a child is worth 1 - Q of its own player.
+        """
+        while True:
+            width = self._width()
+            exploration = c_puct * sqrt(self.N)
+            best_idx, best_score = None, -np.inf
+
+            for idx, prior in zip(self._moves[:width].tolist(), self._priors[:width].tolist()):
+                child = self._children.get(idx)
 
-    def next_child(self):
-        action_values = np.zeros(361)
+                if child is None:
+                    score = self.Q + exploration * prior
+                else:
+                    score = 1 - child.Q + exploration * prior / (1 + child.N)
 
-        idx = self._children.nonzero()
-        action_values[idx] = [n.Q for n in self._children[idx]]
+                if score > best_score:
+                    best_idx, best_score = idx, score
 
-        action_values += self._policy / (self.visits+1)
-        next_idx = int(np.argmax(action_values))
+            if best_idx is None:
+                return None
 
-        if isinstance(self._children[next_idx], Node):
-            return self._children[next_idx]
+            if best_idx in self._children:
+                return self._children[best_idx]
 
-        return self.make_move(next_idx)
+            try:
+                return self.make_move(best_idx)
+            except IllegalMoveError:
+                self._remove_move(best_idx)
+
+    def _remove_move(self, idx: int):
+        keep = self._moves != idx
+        self._moves = self._moves[keep]
+        self._priors = self._priors[keep]
 
     def add_value(self, value):
         self._value += value
+        self._visits += 1
+
+    def evaluate(self, evaluator: 'Evaluator'):
+        value, policy = evaluator.evaluate(self.board)
+        policy = policy * self.board.moves_to_consider().flatten()
 
-    def evaluate(self, model: Model):
-        value, policy = model.predict([[self.board.board_data]])
-        self._value = value.item()
-        self._policy = policy.flatten() * self.board.legal_moves.flatten()
+        moves = np.flatnonzero(policy)
+        order = np.argsort(-policy[moves], kind='stable')
+
+        self._prior_value = value
+        self._moves = moves[order]
+        self._priors = policy[self._moves] / policy[self._moves].sum() if len(moves) else policy[:0]
+
+    def outcome(self) -> Optional[bool]:
+        """ Whether black solved the problem, by the rules or by reading, None if open """
+        if self._outcome is UNDECIDED:
+            solved = self.board.solved()
+            self._outcome = read_targets(self.board) if solved is None else solved
+
+        return self._outcome
 
     def reward(self):
-        solved = self.board.solved()
-        if solved is True:
-            return 1
-        if solved is False:
-            return 0
-        return self.W
+        solved = self.outcome()
+
+        if solved is None:
+            return self._prior_value
+
+        # problems are solved by black, reward is for the player to move
+        return float(solved == (self.board.turn is Location.BLACK))
+
+    def child(self, coord: CoordType) -> 'Node':
+        """ Existing child for the move or a new one """
+        idx = coord[0] * 19 + coord[1]
+
+        if idx in self._children:
+            return self._children[idx]
+
+        return self.make_move(idx)
+
+    def subtree_size(self) -> int:
+        size, unexplored = 0, [self]
+
+        while unexplored:
+            node = unexplored.pop()
+            size += 1
+            unexplored.extend(node._children.values())
+
+        return size
+
+    def prune(self, max_visits: int) -> int:
+        """ Drop child subtrees visited at most max_visits times, return removed nodes count """
+        removed, unexplored = 0, [self]
+
+        while unexplored:
+            node = unexplored.pop()
+
+            for idx, child in list(node._children.items()):
+                if child.N <= max_visits:
+                    removed += child.subtree_size()
+                    del node._children[idx]
+                else:
+                    unexplored.append(child)
+
+        return removed
 
     def make_move(self, next_idx: int):
         board = self.board.copy()
@@ -67,17 +185,24 @@ class Node:
         self._children[next_idx] = Node(board)
         return self._children[next_idx]
 
+    def best_child(self) -> Optional[Tuple[int, 'Node']]:
+        """ Most visited child and its move index """
+        if not self._children:
+            return None
+
+        return max(self._children.items(), key=lambda item: item[1].N)
+
     def perfect_variation(self):
         moves = []
         next_node = self
 
         while True:
-            if next_node.N == 1:
+            best = next_node.best_child()
+            if best is None:
                 break
 
-            idx = int(np.argmax(next_node.visits))
+            idx, next_node = best
             moves.append(divmod(idx, 19))
-            next_node = next_node._children[idx]
 
         return moves
 
@@ -86,8 +211,8 @@ class Node:
 
         while True:
             print(next_node.board)
-            if next_node.N == 1:
+            best = next_node.best_child()
+            if best is None:
                 break
 
-            idx = int(np.argmax(next_node.visits))
-            next_node = next_node._children[idx]
+            _, next_node = best
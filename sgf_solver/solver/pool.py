@@ -0,0 +1,156 @@
+"""
+Pre-fork pool of search workers sharing the model weights.
+
+The parent reads the weights once with h5py into a single read-only NumPy buffer
+and forks the workers, which inherit the buffer copy-on-write instead of reading
+the weights file each. Every worker builds the network of the pool's config from
+the shared arrays in the pool initializer. Keras must not be imported in the parent
+before the pool is started, TensorFlow state does not survive a fork.
+
+Workers are replaced after WORKER_TASKS problems to bound the memory they grow,
+throughput is reported per worker process, including the retired ones.
+"""
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List
+
+import h5py
+import numpy as np
+
+from sgf_solver.board.tsumego import TsumegoBoard
+from sgf_solver.constants import DEFAULT_CONFIG, SERVER_ROLLOUTS, WEIGHTS_PATHS, WORKER_TASKS
+from sgf_solver.solver.mcts import TreeSearch
+from sgf_solver.solver.node import Node
+
+if TYPE_CHECKING:
+    from sgf_solver.solver.cache import SolutionType
+
+ModelFactory = Callable[[List[np.ndarray]], object]
+
+_search = None
+
+
+def read_weights(path: str) -> List[np.ndarray]:
+    """ Weights of a Keras HDF5 weights file, in the order of Model.get_weights """
+    with h5py.File(path, 'r') as file:
+        group = file['model_weights'] if 'model_weights' in file else file
+        weights = []
+
+        for layer_name in group.attrs['layer_names']:
+            layer = group[_decode(layer_name)]
+            weights.extend(layer[_decode(name)][()] for name in layer.attrs['weight_names'])
+
+    return weights
+
+
+def _decode(name) -> str:
+    return name.decode() if isinstance(name, bytes) else name
+
+
+def share_weights(weights: List[np.ndarray]) -> List[np.ndarray]:
+    """ Read-only views of the weights in one contiguous buffer
+
+    Nothing writes to the pages of the buffer, so forked workers keep sharing them.
+    """
+    arrays = [np.asarray(array, dtype=np.float32) for array in weights]
+    buffer = np.empty(sum(array.size for array in arrays), dtype=np.float32)
+
+    views, start = [], 0
+    for array in arrays:
+        view = buffer[start:start + array.size].reshape(array.shape)
+        view[...] = array
+        view.flags.writeable = False
+        views.append(view)
+        start += array.size
+
+    return views
+
+
+def keras_model(weights: List[np.ndarray], config: str = DEFAULT_CONFIG):
+    """ Network of a config with the given weights, built in the worker """
+    from sgf_solver.model.model import create_model
+
+    model = create_model(summary=False, config=config)
+    model.set_weights(weights)
+    return model
+
+
+def _init_worker(model_factory: ModelFactory, weights: List[np.ndarray]):
+    global _search
+    _search = TreeSearch(model_factory(weights), verbose=False)
+
+
+def _solve(task):
+    idx, board, rollouts = task
+    start = time.perf_counter()
+    solution = _search.solve(Node(board), rollouts)
+    return idx, solution, os.getpid(), time.perf_counter() - start
+
+
+class WorkerPool:
+
+    def __init__(self, weights: List[np.ndarray] = None, processes: int = None,
+                 tasks_per_worker: int = WORKER_TASKS, model_factory: ModelFactory = None,
+                 config: str = DEFAULT_CONFIG):
+        """ Weights and the network default to the trained ones of the config """
+        weights = share_weights(read_weights(WEIGHTS_PATHS[config]) if weights is None else weights)
+        model_factory = model_factory or partial(keras_model, config=config)
+
+        self.weights = weights
+        self.processes = processes or os.cpu_count()
+        self.problems: Dict[int, int] = defaultdict(int)
+        self.seconds: Dict[int, float] = defaultdict(float)
+
+        context = multiprocessing.get_context('fork')
+        self._pool = context.Pool(self.processes, _init_worker, (model_factory, weights),
+                                  maxtasksperchild=tasks_per_worker)
+
+    def solve(self, boards: Iterable[TsumegoBoard],
+              rollouts: int = SERVER_ROLLOUTS) -> List['SolutionType']:
+        """ Solutions of the boards, in order """
+        tasks = [(idx, board, rollouts) for idx, board in enumerate(boards)]
+        solutions = [None] * len(tasks)
+
+        for idx, solution, pid, seconds in self._pool.imap_unordered(_solve, tasks):
+            solutions[idx] = solution
+            self.problems[pid] += 1
+            self.seconds[pid] += seconds
+
+        return solutions
+
+    def stats(self) -> Dict[int, dict]:
+        """ Problems, busy seconds and problems per second of every worker process """
+        return {pid: {'problems': problems, 'seconds': self.seconds[pid],
+                      'rate': problems / self.seconds[pid] if self.seconds[pid] else 0}
+                for pid, problems in self.problems.items()}
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    import sys
+    from sgf_solver.dataset import ProblemStore
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    with ProblemStore() as store:
+        boards = [store.board(row) for row in range(count)]
+
+    with WorkerPool() as pool:
+        start = time.perf_counter()
+        pool.solve(boards)
+        elapsed = time.perf_counter() - start
+
+        print(f"{count} problems in {elapsed:.1f} s")
+        for pid, stats in pool.stats().items():
+            print(f"worker {pid}: {stats['problems']} problems, {stats['rate']:.2f} problems/s")
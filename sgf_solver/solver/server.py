@@ -0,0 +1,192 @@
+"""
+Local HTTP/JSON solving service.
+
+The model is loaded and warmed up once, every request runs its own search in a
+server thread and the evaluations of all running searches are batched through a
+``BatchingModel``. The server binds to localhost by default.
+
+    python -m sgf_solver.solver.server [--port N] [--rollouts N] [--cache]
+
+POST /solve with one of
+    {"sgf": "(;AB[..]AW[..])"}                  black to play unless PL[W]
+    {"position": [[0, 1, -1, ...], ...], "turn": 1}
+and optionally "problem": "live" | "kill" and "rollouts": N, returns
+    {"move": [x, y] | null, "variation": [[x, y], ...], "value": Q of the mover,
+     "decided": bool, "cached": bool, "latency": {"wait": s, "search": s, "total": s}}
+
+GET /stats returns request counts, mean latencies and batching statistics.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Tuple
+
+import numpy as np
+
+from sgf_solver.board.tsumego import TsumegoBoard
+from sgf_solver.constants import BOARD_SHAPE, PREDICT_BATCH, SERVER_ADDRESS, SERVER_ROLLOUTS
+from sgf_solver.enums import Location, ProblemClass
+from sgf_solver.parser.parser import TsumegoParser
+from sgf_solver.solver.mcts import TreeSearch
+from sgf_solver.solver.node import Node
+
+if TYPE_CHECKING:
+    from sgf_solver.model.batching import BatchingModel
+    from sgf_solver.solver.cache import SolutionCache
+
+TURNS = {'B': Location.BLACK, 'W': Location.WHITE, 1: Location.BLACK, -1: Location.WHITE}
+
+
+def request_board(request: dict) -> TsumegoBoard:
+    """ Board of a /solve request, raises ValueError for malformed requests """
+    if 'sgf' in request:
+        parser = TsumegoParser.from_string(request['sgf'])
+        position = parser.position
+        player = parser.sgf[0].get('PL')
+        turn = TURNS.get(player.value if player else 'B')
+    elif 'position' in request:
+        position = np.array(request['position'], dtype=int)
+        if position.shape != BOARD_SHAPE or np.any(np.abs(position) > 1):
+            raise ValueError("Position must be 19x19 of 1 (black), -1 (white) and 0")
+        turn = TURNS.get(request.get('turn', 1))
+    else:
+        raise ValueError("Request needs 'sgf' or 'position'")
+
+    if turn is None:
+        raise ValueError("Turn must be B, W, 1 or -1")
+
+    problem = ProblemClass(request['problem']) if 'problem' in request else None
+    return TsumegoBoard(problem, board=position, turn=turn)
+
+
+class SolvingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, model: 'BatchingModel', address: Tuple[str, int] = SERVER_ADDRESS,
+                 rollouts: int = SERVER_ROLLOUTS, max_searches: int = PREDICT_BATCH,
+                 cache: 'SolutionCache' = None):
+        super().__init__(address, SolvingHandler)
+        self.model = model
+        self.rollouts = rollouts
+        self.cache = cache
+
+        self.requests = 0
+        self.errors = 0
+        self.latency = {'wait': 0.0, 'search': 0.0, 'total': 0.0}
+
+        self._searches = threading.BoundedSemaphore(max_searches)
+        self._lock = threading.Lock()
+
+    def solve(self, request: dict) -> dict:
+        start = time.perf_counter()
+        board = request_board(request)
+        rollouts = int(request.get('rollouts', self.rollouts))
+
+        solution = self.cache.get(board, rollouts) if self.cache is not None else None
+        cached = solution is not None
+
+        with self._searches:
+            searching = time.perf_counter()
+            if solution is None:
+                solution = TreeSearch(self.model, verbose=False).solve(Node(board), rollouts)
+                if self.cache is not None:
+                    self.cache.put(board, *solution[:2], rollouts, solution[2])
+        done = time.perf_counter()
+
+        moves, value, decided = solution
+
+        latency = {'wait': searching - start, 'search': done - searching, 'total': done - start}
+        with self._lock:
+            self.requests += 1
+            for name, seconds in latency.items():
+                self.latency[name] += seconds
+
+        return {
+            'move': list(moves[0]) if moves else None,
+            'variation': [list(move) for move in moves],
+            'value': value,
+            'decided': decided,
+            'cached': cached,
+            'latency': latency,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.requests
+            stats = {
+                'requests': requests,
+                'errors': self.errors,
+                'latency': {name: seconds / requests if requests else 0
+                            for name, seconds in self.latency.items()},
+            }
+
+        stats.update(batches=self.model.batches, mean_batch=self.model.mean_batch)
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+
+        return stats
+
+    def count_error(self):
+        with self._lock:
+            self.errors += 1
+
+
+class SolvingHandler(BaseHTTPRequestHandler):
+    server: SolvingServer
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._reply(200, self.server.stats())
+        else:
+            self._reply(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/solve':
+            self._reply(404, {'error': f"Unknown path: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            response = self.server.solve(request)
+        except Exception as error:
+            self.server.count_error()
+            self._reply(400, {'error': f"{type(error).__name__}: {error}"})
+            return
+
+        self._reply(200, response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    import argparse
+    from sgf_solver.constants import DEFAULT_CONFIG, MODEL_CONFIGS
+    from sgf_solver.model import BatchingModel, load_model
+    from sgf_solver.solver.cache import SolutionCache
+
+    arguments = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    arguments.add_argument('--port', type=int, default=SERVER_ADDRESS[1])
+    arguments.add_argument('--rollouts', type=int, default=SERVER_ROLLOUTS)
+    arguments.add_argument('--config', choices=MODEL_CONFIGS, default=DEFAULT_CONFIG)
+    arguments.add_argument('--weights', help="weights file of the config by default")
+    arguments.add_argument('--cache', action='store_true', help="use the solution cache")
+    args = arguments.parse_args()
+
+    batching = BatchingModel(load_model(args.weights, args.config))
+    batching.warm_up()
+
+    server = SolvingServer(batching, (SERVER_ADDRESS[0], args.port), args.rollouts,
+                           cache=SolutionCache() if args.cache else None)
+    print(f"Serving on http://{SERVER_ADDRESS[0]}:{server.server_port}")
+    server.serve_forever()
@@ -0,0 +1,76 @@
+"""
+Flat binary container for named NumPy arrays.
+
+Layout: magic, little-endian uint64 header length, JSON header, then raw array
+data aligned to ALIGNMENT bytes. Arrays are read back with ``np.memmap`` so
+opening a file costs only the header parse, no matter how large it is.
+"""
+import json
+import os
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+from sgf_solver.exceptions import StorageError
+
+MAGIC = b'SGFARRAY'
+ALIGNMENT = 64
+
+ArraysType = Dict[str, np.ndarray]
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_arrays(path: str, arrays: ArraysType, attrs: dict = None) -> None:
+    """ Write arrays atomically, readers mapping the old file are not affected """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps({'attrs': attrs or {}, 'arrays': layout}).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(MAGIC + struct.pack('<Q', len(header)) + header)
+
+        for name, array in arrays.items():
+            file.seek(data_start + layout[name]['offset'])
+            file.write(array.tobytes())
+
+        file.truncate(data_start + offset)
+
+    os.replace(tmp_path, path)
+
+
+def read_arrays(path: str, mmap: bool = True) -> Tuple[ArraysType, dict]:
+    """ Open arrays written by write_arrays, memory-mapped read-only by default """
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise StorageError(f"Not an array file: {path}")
+
+        header_size, = struct.unpack('<Q', file.read(8))
+        header = json.loads(file.read(header_size).decode())
+
+    data_start = _aligned(len(MAGIC) + 8 + header_size)
+    arrays = {}
+
+    for name, info in header['arrays'].items():
+        dtype, shape = np.dtype(info['dtype']), tuple(info['shape'])
+        offset = data_start + info['offset']
+
+        if not np.prod(shape, dtype=int):
+            arrays[name] = np.empty(shape, dtype=dtype)
+        elif mmap:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+        else:
+            arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)),
+                                       offset=offset).reshape(shape)
+
+    return arrays, header['attrs']
@@ -0,0 +1,57 @@
+"""
+The 8 symmetries of the board (dihedral group of the square).
+
+Transforms are numbered in the order used by ``TsumegoParser.flip_transpose``:
+identity, flip rows, flip columns, flip both, and the same four transposed.
+Every transform is a permutation of the 361 points, so stacks of planes and
+flat policy vectors are transformed with a single fancy-indexing call.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from sgf_solver.annotations import CoordType
+
+SYMMETRIES = 8
+
+
+def _transforms(board: np.ndarray) -> List[np.ndarray]:
+    flips = [board, np.flip(board, axis=0), np.flip(board, axis=1), np.flip(board, axis=(0, 1))]
+    return flips + [np.transpose(flip) for flip in flips]
+
+
+# transformed.flat[p] == original.flat[PERMUTATIONS[k, p]]
+PERMUTATIONS = np.array([t.ravel() for t in _transforms(np.arange(361).reshape((19, 19)))])
+INVERSE_PERMUTATIONS = np.argsort(PERMUTATIONS, axis=1)
+
+
+def _permutations(inverse: bool) -> np.ndarray:
+    return INVERSE_PERMUTATIONS if inverse else PERMUTATIONS
+
+
+def transform(array: np.ndarray, k: int, inverse: bool = False) -> np.ndarray:
+    """ Apply transform k to an array whose last axes are the board (19, 19) or flat (361) """
+    shape = array.shape
+    flat = np.asarray(array).reshape((*shape[:-2], 361) if shape[-1] == 19 else shape)
+    return flat[..., _permutations(inverse)[k]].reshape(shape)
+
+
+def transform_batch(arrays: np.ndarray, ks: np.ndarray, inverse: bool = False) -> np.ndarray:
+    """ Apply transform ks[i] to arrays[i], arrays are (N, ..., 19, 19) or (N, ..., 361) """
+    shape = arrays.shape
+    flat = np.asarray(arrays).reshape((shape[0], -1, 361))
+    permutations = _permutations(inverse)[ks][:, np.newaxis, :]
+    return np.take_along_axis(flat, permutations, axis=2).reshape(shape)
+
+
+def transform_coord(coord: CoordType, k: int, inverse: bool = False) -> CoordType:
+    """ Where the point at coord ends up after transform k """
+    x, y = coord
+    return divmod(int(_permutations(not inverse)[k][x * 19 + y]), 19)
+
+
+def canonical_symmetry(array: np.ndarray) -> Tuple[int, np.ndarray]:
+    """ Transform giving the smallest bytes of the array among the 8 symmetries and that form """
+    forms = [transform(array, k) for k in range(SYMMETRIES)]
+    k = min(range(SYMMETRIES), key=lambda k: forms[k].tobytes())
+    return k, forms[k]
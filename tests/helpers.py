@@ -0,0 +1,20 @@
+import numpy as np
+
+from sgf_solver.board import BOARD_SHAPE
+from sgf_solver.enums import Location
+
+
+class UniformModel:
+    def predict(self, data):
+        count = len(data)
+        return np.full((count, 1), 0.5), np.full((count, 361), 1 / 361)
+
+
+corner_live = np.zeros(BOARD_SHAPE, dtype=int)
+corner_live[[0, 1, 2, 2, 2], [3, 3, 2, 1, 0]] = Location.BLACK
+corner_live[[0, 1, 2, 2, 3, 3, 3, 3], [4, 4, 4, 3, 3, 2, 1, 0]] = Location.WHITE
+
+BRANCHING_PROBLEM = """(;GM[1]FF[4]SZ[19]AB[da][db][cc][bc][ac]AW[ea][eb][ec][dc][dd][cd][bd][ad]
+(;B[bb](;W[ba];B[ab]C[Correct.])(;W[ab];B[ba]C[Correct.])(;W[ca]))
+(;B[ba];W[bb]C[Wrong.])
+(;B[ab];W[bb]C[Wrong.]))"""
@@ -0,0 +1,44 @@
+import numpy as np
+
+from sgf_solver.board.analysis import BatchAnalysis, GroupAnalyzer, label_components
+from sgf_solver.board.tsumego import classify_problems
+from sgf_solver.enums import Location
+
+
+def _components(labels):
+    return sorted(sorted(zip(*np.nonzero(labels == label)))
+                  for label in np.unique(labels[labels > 0]))
+
+
+def test_batch_analysis_matches_group_analyzer():
+    random = np.random.RandomState(0)
+    positions = random.choice([-1, 0, 1], size=(40, 19, 19), p=[0.2, 0.6, 0.2])
+    positions *= random.rand(40, 19, 19) < random.rand(40, 1, 1)
+
+    analysis = BatchAnalysis(positions)
+    assert len(analysis) == 40
+    assert np.array_equal(analysis.live, classify_problems(positions))
+
+    for number, position in enumerate(positions):
+        board = GroupAnalyzer(position)
+
+        for color in (Location.BLACK, Location.WHITE):
+            regions = analysis.regions[color][number]
+            assert _components(regions) == sorted(map(sorted, board._get_regions(color)))
+            assert sorted(map(sorted, board.batch_interiors(color))) == \
+                sorted(map(sorted, board.get_interiors(color)))
+
+            labels = analysis.groups[color][number]
+            for label in np.unique(labels[labels > 0]):
+                assert np.flatnonzero(labels == label)[0] + 1 == label
+
+
+def test_label_components_follows_long_chains():
+    snake = np.zeros((19, 19), dtype=bool)
+    snake[::2] = True
+    snake[1::4, -1] = True
+    snake[3::4, 0] = True
+
+    labels = label_components(np.stack([snake, ~snake]))
+    assert np.unique(labels[0][snake]).tolist() == [1]
+    assert len(np.unique(labels[1][~snake])) == 9
@@ -0,0 +1,154 @@
+import os
+
+import h5py
+import numpy as np
+import pytest
+
+from sgf_solver.dataset import Deduplicator, build_dataset, builder, find_sgf_files
+
+LIVE_PROBLEM = """(;GM[1]FF[4]SZ[19]AB[da][db][cc][bc][ac]AW[ea][eb][ec][dc][dd][cd][bd][ad]
+(;B[bb];W[ba];B[ab]C[Correct.])
+(;B[ba];W[bb]C[Wrong.])
+(;B[ab];W[bb]C[Wrong.]))"""
+
+SHORT_PROBLEM = """(;GM[1]FF[4]SZ[19]AB[da][db][cc][bc][ac]AW[ea][eb][ec][dc][dd][cd][bd][ad]
+(;B[bb]C[Correct.])
+(;B[ca];W[bb]C[Wrong.]))"""
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    directory = tmp_path / 'sgf'
+    (directory / 'nested').mkdir(parents=True)
+
+    for number in range(6):
+        (directory / f'live_{number}.sgf').write_text(LIVE_PROBLEM)
+        (directory / 'nested' / f'short_{number}.sgf').write_text(SHORT_PROBLEM)
+    (directory / 'broken.sgf').write_text('not an sgf file')
+
+    return str(directory)
+
+
+def _read(path):
+    with h5py.File(path, 'r') as dataset:
+        return [dataset[name][:] for name in ('problems', 'values', 'answers')]
+
+
+def test_build_is_deterministic(corpus, tmp_path):
+    files = find_sgf_files(corpus)
+    first, second = str(tmp_path / 'first.h5'), str(tmp_path / 'second.h5')
+
+    errors = build_dataset(files, first, workers=1, shard_rows=1000)
+    build_dataset(files, second, workers=3, shard_rows=4)
+
+    assert len(files) == 13
+    assert len(errors) == 1 and 'broken.sgf' in errors[0]
+    for one, other in zip(_read(first), _read(second)):
+        assert np.array_equal(one, other)
+
+    problems, values, answers = _read(first)
+    assert len(problems) == len(values) == len(answers) == 6 * 5 + 6 * 2
+
+
+def test_incremental_rebuild(corpus, tmp_path, monkeypatch):
+    output = str(tmp_path / 'dataset.h5')
+    build_dataset(find_sgf_files(corpus), output, workers=1, shard_rows=4)
+    full = _read(output)
+
+    # nothing changed: no parsing and no merge
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected work")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(builder, '_parse_files', fail)
+        patch.setattr(builder, 'merge_rows', fail)
+        build_dataset(find_sgf_files(corpus), output, workers=1)
+
+    # modified and removed files
+    (tmp_path / 'sgf' / 'live_0.sgf').write_text(SHORT_PROBLEM)
+    (tmp_path / 'sgf' / 'live_1.sgf').unlink()
+    parsed = []
+    original = builder._parse_files
+
+    def record(files, *args):
+        parsed.extend(files)
+        return original(files, *args)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(builder, '_parse_files', record)
+        build_dataset(find_sgf_files(corpus), output, workers=1)
+
+    problems, values, _ = _read(output)
+    assert parsed == []  # the new content is identical to an already parsed file
+    assert len(problems) == len(full[0]) - 5 - 5 + 2
+
+    (tmp_path / 'sgf' / 'live_2.sgf').write_text(LIVE_PROBLEM.replace('Correct.', 'Correct!'))
+    with monkeypatch.context() as patch:
+        patch.setattr(builder, '_parse_files', record)
+        build_dataset(find_sgf_files(corpus), output, workers=1)
+
+    assert [path.rsplit('/', 1)[-1] for path in parsed] == ['live_2.sgf']
+    assert np.array_equal(_read(output)[0], problems)
+
+
+def test_dedup_merges_corpus(corpus, tmp_path):
+    files = find_sgf_files(corpus)
+    plain, extended = str(tmp_path / 'plain.h5'), str(tmp_path / 'extended.h5')
+
+    build_dataset(files, plain, workers=1, dedup=True)
+    build_dataset(files, extended, extend=True, workers=1, dedup=True, canonical=True)
+    problems, values, answers = _read(plain)
+
+    # the two problems share the root position, its answer is counted once per file
+    assert len(problems) == 5 + 2 - 1
+    assert len({problem.tobytes() for problem in problems}) == len(problems)
+    assert np.array_equal(_read(extended)[1], values)
+    assert answers[0].max() == answers[0].sum() == 12
+
+    # a second correct answer found in one file is added to the shared root row
+    other = LIVE_PROBLEM.replace('(;B[ab];W[bb]C[Wrong.])', '(;B[ba];W[ab];B[bb]C[Correct.])')
+    (tmp_path / 'sgf' / 'live_0.sgf').write_text(other)
+    build_dataset(files, plain, workers=1, dedup=True)
+    merged, _, merged_answers = _read(plain)
+
+    root = [index for index, problem in enumerate(merged) if np.array_equal(problem, problems[0])]
+    assert len(root) == 1
+    assert sorted(merged_answers[root[0]][merged_answers[root[0]] > 0]) == [1, 12]
+
+
+def test_manifest_saved_before_orphaned_shards_removed(corpus, tmp_path, monkeypatch):
+    output = str(tmp_path / 'dataset.h5')
+    build_dataset(find_sgf_files(corpus), output, workers=1, shard_rows=4)
+    for path in find_sgf_files(corpus)[1:]:
+        os.remove(path)
+
+    removed = []
+    original = os.remove
+
+    def remove(path):
+        manifest = builder.load_manifest(os.path.dirname(path), False)
+        shards = {entry['shard'] for entry in manifest['entries'].values()}
+        assert os.path.basename(path) not in shards
+        removed.append(path)
+        original(path)
+
+    monkeypatch.setattr(builder.os, 'remove', remove)
+    build_dataset(find_sgf_files(corpus), output, workers=1)
+
+    assert removed
+
+
+def test_dedup_answer_counts_saturate():
+    problems = np.zeros((200, 19, 19, 4), dtype=np.int8)
+    values, answers = np.ones(200, dtype=np.int8), np.zeros((200, 19, 19), dtype=np.int8)
+    answers[:, 3, 3] = 1
+    answers[0, 3, 3] = 100
+
+    deduplicator = Deduplicator()
+    deduplicator.add(problems[:100], values[:100], answers[:100])
+    deduplicator.add(problems[100:], values[100:], answers[100:])
+    kept = [deduplicator.select(problems[:100], values[:100], answers[:100]),
+            deduplicator.select(problems[100:], values[100:], answers[100:])]
+
+    assert [len(batch[0]) for batch in kept] == [1, 0]
+    assert kept[0][2][0, 3, 3] == np.iinfo(np.int8).max
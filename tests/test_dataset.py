@@ -0,0 +1,78 @@
+import itertools
+
+import h5py
+import numpy as np
+import pytest
+
+from sgf_solver.enums import Augmentation
+from sgf_solver.model.dataset import ProblemBatches, distill, prefetch
+from sgf_solver.symmetry import SYMMETRIES, transform
+
+COUNT = 1000
+
+
+@pytest.fixture
+def dataset_path(tmp_path):
+    path = str(tmp_path / 'problems.h5')
+    random = np.random.RandomState(0)
+
+    with h5py.File(path, 'w') as dataset:
+        problems = random.randint(-1, 2, (COUNT, 9, 19, 19))
+        problems[:, 0, 0, 0] = np.arange(COUNT)
+        answers = np.eye(361, dtype=int)[np.arange(COUNT) % 361].reshape((COUNT, 19, 19))
+
+        dataset.create_dataset('problems', data=problems, chunks=(100, 9, 19, 19))
+        dataset.create_dataset('values', data=np.arange(COUNT) % 2)
+        dataset.create_dataset('answers', data=answers)
+
+    return path
+
+
+def test_split_by_blocks(dataset_path):
+    train, validation = ProblemBatches.split(dataset_path, batch_size=64, validation_split=0.2)
+
+    train_rows = [int(row) for problems, _ in train.epoch() for row in problems[:, 0, 0, 0]]
+    validation_rows = [int(row) for problems, _ in validation.epoch()
+                       for row in problems[:, 0, 0, 0]]
+
+    assert len(train_rows) == train.rows == 800
+    assert len(validation_rows) == validation.rows == 200
+    assert sorted(train_rows + validation_rows) == list(range(COUNT))
+
+
+def test_batches_are_aligned(dataset_path):
+    train, _ = ProblemBatches.split(dataset_path, batch_size=64)
+    problems, (values, answers) = next(prefetch(train))
+
+    rows = problems[:, 0, 0, 0].astype(int)
+    assert problems.dtype == values.dtype == answers.dtype == np.float32
+    assert np.array_equal(values[:, 0], rows % 2)
+    assert np.array_equal(answers.argmax(axis=1), rows % 361)
+
+
+def test_augmentation_transforms_planes_and_answers(dataset_path):
+    train, _ = ProblemBatches.split(dataset_path, batch_size=64)
+    augmented, _ = ProblemBatches.split(dataset_path, batch_size=64, augment=Augmentation.CYCLE)
+
+    (problems, (_, answers)), = itertools.islice(train.epoch(), 1)
+    (cycled, (_, cycled_answers)), = itertools.islice(augmented.epoch(), 1)
+
+    for k in range(SYMMETRIES):
+        assert np.array_equal(cycled[k], transform(problems[k], k))
+        assert np.array_equal(cycled_answers[k], transform(answers[k], k))
+
+
+class ConstantTeacher:
+    def predict_on_batch(self, problems):
+        return np.ones((len(problems), 1)), np.full((len(problems), 361), 1 / 361)
+
+
+def test_distill_blends_teacher_outputs(dataset_path):
+    train, _ = ProblemBatches.split(dataset_path, batch_size=64, validation_split=0.2)
+    (_, (values, answers)), = itertools.islice(train.epoch(), 1)
+    (_, (soft_values, soft_answers)), = itertools.islice(
+        distill(train.epoch(), ConstantTeacher(), alpha=0.5), 1)
+
+    assert np.allclose(soft_values, 0.5 + values / 2)
+    assert np.allclose(soft_answers.sum(axis=1), 1)
+    assert np.array_equal(soft_answers.argmax(axis=1), answers.argmax(axis=1))
@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+
+from sgf_solver.board import GoBoard, TsumegoBoard
+from sgf_solver.board.fast import FastBoard, point
+from sgf_solver.enums import Location
+from sgf_solver.exceptions import IllegalMoveError
+from sgf_solver.model.patterns import PatternCodes, PatternTable, pattern_codes
+from sgf_solver.solver import Node, PlayoutEvaluator, TreeSearch
+from sgf_solver.solver.evaluators import ko_point
+from tests.helpers import corner_live
+
+
+def test_fast_board_matches_go_board():
+    rng = random.Random(1)
+    board, fast = GoBoard(np.zeros((19, 19))), FastBoard(np.zeros((19, 19)))
+    start = fast.mark()
+
+    for _ in range(1000):
+        coord = rng.randrange(7), rng.randrange(7)
+        try:
+            board.move(coord)
+        except IllegalMoveError:
+            assert not fast.play(point(coord))
+            continue
+
+        assert fast.play(point(coord)) and fast.turn == board.turn
+        assert np.array_equal(fast.position(), board.board)
+
+    fast.undo(start)
+    assert not fast.position().any() and fast.turn == 1 and fast.ko is None
+
+
+def test_fast_board_updates_pattern_codes():
+    rng = random.Random(2)
+    position = np.zeros((19, 19), dtype=int)
+    fast = FastBoard(position, patterns=PatternCodes(position, diamond=True))
+    start = fast.mark()
+
+    for _ in range(300):
+        fast.play(point((rng.randrange(6), rng.randrange(6))))
+    assert np.array_equal(fast.patterns.codes, pattern_codes(fast.position(), True)[0])
+
+    fast.undo(start)
+    assert np.array_equal(fast.patterns.codes, pattern_codes(position, True)[0])
+
+
+def test_playouts_keep_ko_ban():
+    position = np.zeros((19, 19), dtype=int)
+    position[[0, 1, 2], [1, 0, 1]] = Location.BLACK
+    position[[1, 0, 2, 1], [1, 2, 2, 3]] = Location.WHITE
+    board = TsumegoBoard(board=position)
+    board.move((1, 2))
+
+    assert ko_point(board) == (1, 1)
+    fast = FastBoard(board.board, board.turn, ko_point(board))
+    assert not fast.play(point((1, 1)))
+
+
+def test_search_without_model():
+    board = TsumegoBoard(board=corner_live)
+    evaluator = PlayoutEvaluator(4, seed=0)
+
+    value, policy = evaluator.evaluate(board)
+    assert 0 <= value <= 1 and np.isclose(policy.sum(), 1)
+    assert not policy.reshape((19, 19))[10:, 10:].any()
+
+    root = Node(board)
+    TreeSearch(evaluator=evaluator).rollout(root, 10)
+    assert root.N == 10 and evaluator.games > 4
+
+    table = PatternTable(np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32), 0.1)
+    guided = PlayoutEvaluator(4, table, seed=0).evaluate(board)
+    assert 0 <= guided[0] <= 1
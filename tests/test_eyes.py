@@ -0,0 +1,44 @@
+import numpy as np
+
+from sgf_solver.board import TsumegoBoard
+from sgf_solver.board.eyes import eye_shape, read_shape
+from sgf_solver.enums import Location, ProblemClass
+
+
+def _enclosed(space, turn):
+    """ Black chain whose only liberties are space, walled in by white """
+    board = np.zeros((19, 19), dtype=int)
+    for distance, color in ((2, Location.WHITE), (1, Location.BLACK)):
+        for x, y in space:
+            board[max(x - distance, 0):x + distance + 1,
+                  max(y - distance, 0):y + distance + 1] = color
+    board[tuple(zip(*space))] = Location.EMPTY
+
+    return TsumegoBoard(ProblemClass.LIVE, board=board, turn=turn)
+
+
+def test_read_shapes():
+    straight_three = read_shape(frozenset([(0, 0), (0, 1), (0, 2)]))
+    square_four = read_shape(frozenset([(0, 0), (0, 1), (1, 0), (1, 1)]))
+    bent_four = read_shape(frozenset([(0, 0), (1, 0), (2, 0), (2, 1)]))
+
+    assert straight_three == (True, True, {(0, 1)})
+    assert square_four == (False, True, set())
+    assert bent_four == (True, False, set())
+
+
+def test_lookup_maps_vital_points():
+    # bulky five in the corner, in a different orientation than in the table
+    space = [(0, 0), (0, 1), (1, 0), (1, 1), (0, 2)]
+    shape = eye_shape(space)
+
+    assert shape.defender_lives and shape.attacker_kills and shape.vital == ((0, 1),)
+    assert eye_shape([(5, 5), (5, 6)]).lives(True) is False
+
+
+def test_solved_by_eye_shape():
+    pyramid = [(0, 3), (0, 4), (0, 5), (1, 4)]
+
+    assert _enclosed(pyramid, Location.BLACK).solved() is True
+    assert _enclosed(pyramid, Location.WHITE).solved() is False
+    assert _enclosed(pyramid, Location.WHITE).solved(eyes=False) is None
@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.import_time import MODULES, import_times
+
+HEAVY_MODULES = {'keras', 'tensorflow', 'h5py'}
+# generous budget on top of NumPy itself, catches accidental heavy imports
+IMPORT_TIME_BUDGET_US = 1_000_000
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_no_heavy_imports(module):
+    times = import_times(module)
+    heavy = {name for name in times if name.split('.')[0] in HEAVY_MODULES}
+
+    assert not heavy
+    assert times[module] < IMPORT_TIME_BUDGET_US
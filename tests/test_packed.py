@@ -0,0 +1,43 @@
+import numpy as np
+
+from sgf_solver.dataset import PackedDataset, write_packed
+
+random = np.random.RandomState(0)
+problems = random.randint(-1, 2, (50, 9, 19, 19))
+problems[:, -1] = np.abs(problems[:, -1])
+values = random.randint(0, 2, 50)
+answers = np.zeros((50, 19, 19), dtype=int)
+answers.reshape((50, 361))[np.arange(50), random.randint(0, 361, 50)] = 1
+answers[7] = 0
+answers[7, 0, 5] = 1
+answers[7, 3, 3] = 2
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / 'problems.packed')
+    write_packed(path, problems, values, answers)
+    packed = PackedDataset(path)
+
+    assert len(packed) == 50
+    assert np.array_equal(packed.problems(), problems)
+    assert np.array_equal(packed.values(), values)
+    assert np.array_equal(packed.answers(), answers)
+
+
+def test_random_access(tmp_path):
+    path = str(tmp_path / 'problems.packed')
+    write_packed(path, problems, values, answers)
+    packed = PackedDataset(path)
+    rows = np.array([7, 0, 49, 7])
+
+    assert np.array_equal(packed.problems(rows), problems[rows])
+    assert np.array_equal(packed.answers(rows), answers[rows])
+    assert np.array_equal(packed.answers(slice(5, 9)), answers[5:9])
+    assert packed.answer_moves(7).tolist() == [5, 60, 60]
+
+
+def test_float_answers(tmp_path):
+    path = str(tmp_path / 'problems.packed')
+    write_packed(path, problems, values, answers.astype(np.float32))
+
+    assert np.array_equal(PackedDataset(path).answers(), answers)
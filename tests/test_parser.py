@@ -0,0 +1,68 @@
+import numpy as np
+
+from sgf_solver.board import GoBoard
+from sgf_solver.parser import TsumegoParser
+from sgf_solver.parser.sgflib import (
+    NODE, PROPERTY, START_TREE, Node, Property, SGFParser, read_game_trees,
+)
+from tests.helpers import BRANCHING_PROBLEM
+
+
+def test_shared_prefix_is_played_once(tmp_path, monkeypatch):
+    path = tmp_path / 'problem.sgf'
+    path.write_text(BRANCHING_PROBLEM)
+
+    moves = []
+    original = GoBoard.move
+
+    def move(board, coord, *args, **kwargs):
+        moves.append(coord)
+        return original(board, coord, *args, **kwargs)
+
+    monkeypatch.setattr(GoBoard, 'move', move)
+    problems, values, answers = TsumegoParser(str(path)).get_dataset(extend=False)
+
+    # B[bb] is played once for its three variations, the uncommented one has no samples
+    assert moves.count((1, 1)) == 1 + 2
+    assert len(problems) == 3 + 3 + 1 + 1
+    assert list(values) == [1, 0, 1, 1, 0, 1, 1, 1]
+    assert np.array_equal(problems[0], problems[3])
+    assert answers.reshape((-1, 361)).argmax(axis=1).tolist()[:4] == [20, 1, 19, 20]
+
+
+def test_sgf_values_are_unescaped():
+    collection = SGFParser('(;GM[1] C [a\\]b\\\\c\\\nd\te] AB[aa] [bb](;B[cc]))\n').parse()
+    root = collection[0][0]
+
+    assert root.get('C').value == 'a]b\\cd e'
+    assert root.get('AB').data == ('aa', 'bb')
+    assert collection[0].variations[0][0].get('B').value == 'cc'
+    assert str(collection) == '(;GM[1]C[a\\]b\\\\cd e]AB[aa][bb]\n(;B[cc]))'
+
+
+def test_deep_variations_are_parsed_iteratively(tmp_path):
+    depth = 5000
+    sgf_data = '(;GM[1]' + '(;B[aa]' * depth + ')' * depth + ')\n(;GM[1]C[second])'
+    path = tmp_path / 'deep.sgf'
+    path.write_text(sgf_data)
+
+    events = list(SGFParser(sgf_data).events())
+    assert events[:3] == [(START_TREE, None), (NODE, None), (PROPERTY, ('GM', ['1']))]
+    assert sum(event == START_TREE for event, _ in events) == depth + 2
+
+    first, second = read_game_trees(str(path))
+    assert second[0].get('C').value == 'second'
+
+    game_tree = first
+    for _ in range(depth):
+        game_tree = game_tree.variations[0]
+    assert game_tree[0].get('B').value == 'aa' and not game_tree.variations
+
+
+def test_node_properties():
+    node = Node([Property('B', ['aa']), Property('C', ['', 'Correct.']), Property('B', ['bb'])])
+
+    assert node.get('B').value == 'aa' and node['C'].data == ('Correct.',)
+    assert list(node) == ['B', 'C'] and 'W' not in node and node.get('W') is None
+    assert str(node) == ';B[aa]C[Correct.]'
+    assert Property('AB', []).data == () and not Node([Property('AB', [''])])
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from sgf_solver.board import TsumegoBoard
+from sgf_solver.enums import Location
+from sgf_solver.exceptions import IllegalMoveError
+from sgf_solver.model.patterns import PatternCodes, PatternModel, PatternTable, pattern_codes
+from sgf_solver.parser import TsumegoParser
+from sgf_solver.solver import Node, TreeSearch
+from tests.helpers import BRANCHING_PROBLEM, corner_live
+
+
+def test_codes_follow_moves():
+    position = np.random.RandomState(0).choice([-1, 0, 0, 1], (19, 19))
+    codes = PatternCodes(position, diamond=True)
+
+    for coord, color in [((0, 0), Location.BLACK), ((5, 7), Location.EMPTY),
+                         ((18, 3), Location.WHITE), ((9, 9), Location.BLACK)]:
+        position[coord] = color
+        codes.set(coord, color)
+
+    assert np.array_equal(codes.codes, pattern_codes(position, diamond=True)[0])
+    assert np.array_equal(codes.relative(Location.WHITE), pattern_codes(-position, True)[0])
+
+
+def test_learned_priors_as_policy(tmp_path):
+    problems, _, answers = TsumegoParser.from_string(BRANCHING_PROBLEM).get_dataset(extend=False)
+    PatternTable.learn([(problems, answers)]).save(str(tmp_path / 'patterns.table'))
+    table = PatternTable.load(str(tmp_path / 'patterns.table'))
+
+    _, policy = PatternModel(table).predict([problems[:1]])
+    answer = answers[0].reshape(-1).argmax()
+    assert np.isclose(policy.sum(), 1) and policy[0, answer] > table.default
+
+    board = TsumegoBoard(board=problems[0, 0])
+    _, evaluated = PatternModel(table).evaluate(board)
+    assert np.allclose(evaluated, policy[0])
+
+    root = Node(board)
+    TreeSearch(evaluator=PatternModel(table)).rollout(root, 10)
+    assert root.N == 10
+
+
+def test_board_keeps_codes_in_step():
+    board = TsumegoBoard(board=corner_live)
+    codes = board.patterns(diamond=True)
+
+    # black takes the vital point, white captures nothing, then an illegal move is rejected
+    board.move((1, 1))
+    copy = board.copy()
+    copy.move((0, 0))
+    with pytest.raises(IllegalMoveError):
+        copy.move((0, 0))
+
+    for played in (board, copy):
+        assert np.array_equal(played.patterns(True).codes, pattern_codes(played.board, True)[0])
+    assert board.patterns(True) is codes
+
+    copy.undo()
+    assert np.array_equal(copy.patterns(True).codes, codes.codes)
+
+    position = np.zeros((19, 19), dtype=int)
+    position[0, :2] = Location.BLACK, Location.WHITE
+    capture = TsumegoBoard(board=position, turn=Location.WHITE)
+    capture.patterns()
+    capture.move((1, 0))
+    assert capture.board[0, 0] == Location.EMPTY
+    assert np.array_equal(capture.patterns().codes, pattern_codes(capture.board)[0])
@@ -0,0 +1,41 @@
+import h5py
+import numpy as np
+
+from sgf_solver.board import TsumegoBoard
+from sgf_solver.solver.pool import WorkerPool, read_weights, share_weights
+from tests.helpers import UniformModel, corner_live
+
+
+def _uniform_model(weights):
+    assert not any(array.flags.writeable for array in weights)
+    return UniformModel()
+
+
+def test_read_weights_in_layer_order(tmp_path):
+    path = str(tmp_path / 'weights.h5')
+    kernel, bias, gamma = np.ones((3, 3)), np.arange(3), np.full(2, 0.5)
+
+    with h5py.File(path, 'w') as file:
+        file.attrs['layer_names'] = [b'conv', b'norm']
+        file.create_group('conv').attrs['weight_names'] = [b'conv/kernel:0', b'conv/bias:0']
+        file['conv/conv/kernel:0'], file['conv/conv/bias:0'] = kernel, bias
+        file.create_group('norm').attrs['weight_names'] = [b'norm/gamma:0']
+        file['norm/norm/gamma:0'] = gamma
+
+    weights = read_weights(path)
+
+    assert all(np.array_equal(read, array) for read, array in zip(weights, [kernel, bias, gamma]))
+    shared = share_weights(weights)
+    assert shared[0].base is shared[2].base and not shared[1].flags.writeable
+
+
+def test_workers_are_recycled():
+    boards = [TsumegoBoard(board=np.roll(corner_live, shift, axis=1)) for shift in range(5)]
+
+    with WorkerPool([np.zeros(3)], processes=1, tasks_per_worker=2,
+                    model_factory=_uniform_model) as pool:
+        solutions = pool.solve(boards, rollouts=5)
+        stats = pool.stats()
+
+    assert all(moves and 0 <= value <= 1 for moves, value, _ in solutions)
+    assert len(stats) == 3 and sum(worker['problems'] for worker in stats.values()) == 5
@@ -0,0 +1,102 @@
+import numpy as np
+
+from sgf_solver.board import TsumegoBoard
+from sgf_solver.enums import Location
+from sgf_solver.solver import TreeSearch, Node, SolutionCache
+from sgf_solver.symmetry import transform, transform_coord
+from tests.helpers import UniformModel, corner_live
+
+
+def test_progressive_widening():
+    root = Node(TsumegoBoard(board=corner_live))
+    tree = TreeSearch(UniformModel())
+    tree.rollout(root, 1)
+
+    assert root.N == 1
+    assert root._width() == 3
+    assert len(root._moves) == np.count_nonzero(root.board.moves_to_consider())
+
+    tree.rollout(root, 20)
+
+    assert root.N == 21
+    assert 0 < len(root._children) <= root._width()
+    assert root.visits.sum() == root.N - 1
+
+
+def test_checkpoint_resume(tmp_path):
+    path = str(tmp_path / 'tree.bin')
+    root = Node(TsumegoBoard(board=corner_live))
+    tree = TreeSearch(UniformModel(), c_puct=2.5)
+    tree.rollout(root, 30)
+    tree.save(path, root)
+
+    resumed, loaded = TreeSearch.load(path, UniformModel())
+
+    assert resumed.c_puct == 2.5
+
+    assert loaded.N == root.N
+    assert np.array_equal(loaded.visits, root.visits)
+    assert loaded.perfect_variation() == root.perfect_variation()
+
+    resumed.rollout(loaded, 10)
+    assert loaded.N == root.N + 10
+
+
+def test_advance_keeps_subtree():
+    root = Node(TsumegoBoard(board=corner_live))
+    tree = TreeSearch(UniformModel())
+    tree.rollout(root, 30)
+
+    idx, best = root.best_child()
+    visits = best.N
+    child = tree.advance(root, divmod(idx, 19))
+
+    assert child is best and child.N == visits
+    assert not root._children
+    assert tree.nodes == child.subtree_size()
+
+
+def test_prune_to_node_limit():
+    root = Node(TsumegoBoard(board=corner_live))
+    tree = TreeSearch(UniformModel(), max_nodes=20)
+    tree.rollout(root, 60)
+
+    assert tree.prunings > 0 and tree.reclaimed > 0
+    assert root.subtree_size() == tree.nodes <= 20
+    assert root.N == 60
+
+
+def test_solution_cache_maps_symmetric_problems(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'solutions.sqlite'), max_entries=2)
+    moves, value, _ = TreeSearch(UniformModel()).solve(Node(TsumegoBoard(board=corner_live)), 20,
+                                                       cache)
+
+    # rotated and colour-swapped problem, white to move, answered without a search
+    k = 6
+    swapped = TsumegoBoard(board=-transform(corner_live, k), turn=Location.WHITE)
+    cached = TreeSearch(model=None).solve(Node(swapped), 20, cache)
+
+    assert cached[0] == [transform_coord(move, k) for move in moves] and cached[1] == value
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get(swapped, budget=40) is None and cache.hit_rate == 1 / 3
+
+    for shift in (1, 2):
+        cache.put(TsumegoBoard(board=np.roll(corner_live, shift, axis=1)), [], 0.5, 10)
+    assert len(cache) == 2 and cache.get(swapped) is None
+
+
+def test_solution_cache_keys_targets_and_history(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'solutions.sqlite'))
+    board = TsumegoBoard(board=corner_live)
+    cache.put(board, [(1, 1)], 0.5, 10)
+
+    stones = board.stones.copy()
+    stones[0, 3] = 0
+    assert cache.get(TsumegoBoard(board.problem, stones, board=corner_live)) is None
+
+    played = board.copy()
+    played.move((1, 1))
+    played.move((0, 0))
+    cache.put(played, [(0, 1)], 0.5, 10)
+    assert cache.get(played) is None and len(cache) == 1
+    assert cache.get(board) == ([(1, 1)], 0.5, False)
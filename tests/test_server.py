@@ -0,0 +1,67 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pytest
+
+from sgf_solver.model.batching import BatchingModel
+from sgf_solver.solver.cache import SolutionCache
+from sgf_solver.solver.server import SolvingServer
+from tests.helpers import UniformModel, corner_live
+
+CORNER_SGF = '(;AB[da][db][cc][bc][ac]AW[ea][eb][ec][dc][dd][cd][bd][ad])'
+
+
+@pytest.fixture
+def server(tmp_path):
+    model = BatchingModel(UniformModel(), max_wait=0.01)
+    server = SolvingServer(model, ('127.0.0.1', 0), rollouts=10,
+                           cache=SolutionCache(str(tmp_path / 'solutions.sqlite')))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f'http://127.0.0.1:{server.server_port}'
+
+    server.shutdown()
+    server.server_close()
+    model.close()
+
+
+def _post(url, payload):
+    request = Request(url + '/solve', json.dumps(payload).encode(),
+                      {'Content-Type': 'application/json'})
+    with urlopen(request) as response:
+        return json.load(response)
+
+
+def test_concurrent_requests_are_batched(server):
+    # distinct positions, none of them can be answered by another one from the cache
+    requests = [{'position': np.roll(corner_live, shift, axis=1).tolist(), 'rollouts': 10 + shift}
+                for shift in range(1, 7)]
+    requests.append({'sgf': CORNER_SGF})
+
+    with ThreadPoolExecutor(len(requests)) as pool:
+        responses = list(pool.map(lambda payload: _post(server, payload), requests))
+
+    for response in responses:
+        assert response['move'] == response['variation'][0]
+        assert 0 <= response['value'] <= 1 and not response['cached']
+        assert response['latency']['total'] >= response['latency']['search']
+
+    assert _post(server, requests[0])['cached']
+
+    with urlopen(server + '/stats') as response:
+        stats = json.load(response)
+    assert stats['requests'] == len(requests) + 1
+    assert stats['mean_batch'] > 1 and stats['cache']['hits'] == 1
+
+
+def test_malformed_request(server):
+    with pytest.raises(HTTPError) as error:
+        _post(server, {'position': [[0, 1]]})
+
+    assert error.value.code == 400
+    assert 'Position' in json.load(error.value)['error']
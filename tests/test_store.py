@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+
+from sgf_solver.dataset import ProblemStore, build_dataset, find_sgf_files
+from sgf_solver.enums import ProblemClass
+
+CORNER_PROBLEM = """(;GM[1]FF[4]SZ[19]AB[da][db][cc][bc][ac]AW[ea][eb][ec][dc][dd][cd][bd][ad]
+(;B[bb];W[ba];B[ab]C[Correct.])
+(;B[ba];W[bb]C[Wrong.]))"""
+
+
+def test_store_index_and_selection(tmp_path):
+    (tmp_path / 'a.sgf').write_text(CORNER_PROBLEM)
+    (tmp_path / 'b.sgf').write_text(CORNER_PROBLEM.replace('Correct.', 'Correct!'))
+    output = str(tmp_path / 'dataset.h5')
+    build_dataset(find_sgf_files(str(tmp_path)), output, workers=1)
+
+    with ProblemStore(output, cache_chunks=1) as store:
+        assert len(store) == 8 and os.path.exists(f'{output}.index')
+
+        problem, value, answers = store[0]
+        metadata = store.metadata(0)
+        assert value == metadata['value'] == 1 and metadata['answers'] == 1
+        assert metadata['source'].endswith('a.sgf') and store.source(4).endswith('b.sgf')
+        assert metadata['bbox'] == (0, 3, 0, 4)
+        assert metadata['black'] == np.count_nonzero(problem[0] > 0)
+
+        # black to move is defending the corner: stones relative to the mover live
+        board = store.board(0)
+        assert board.problem is metadata['problem'] is ProblemClass.LIVE
+        assert np.array_equal(board.stones, metadata['targets'])
+
+        rows = store.select(problem=ProblemClass.LIVE, value=1, source=metadata['source'])
+        assert list(rows) == [row for row in range(4) if store.metadata(row)['value'] == 1
+                              and store.problem_class(row) is ProblemClass.LIVE]
+        assert list(store.select(black=(None, -1))) == []
+        assert len(store.select(within=(0, 4, 0, 4))) == 8
+
+        problems, values, _ = store.problems([5, 1])
+        assert np.array_equal(problems[1], store[1][0]) and values[0] == store[5][1]
+        assert store.misses == 1 and store.hits > 0
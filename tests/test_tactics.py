@@ -0,0 +1,73 @@
+import numpy as np
+
+from sgf_solver.board import TsumegoBoard
+from sgf_solver.board.tactics import read_targets
+from sgf_solver.enums import Location, ProblemClass
+from sgf_solver.solver import Node, TreeSearch
+from tests.helpers import UniformModel
+
+
+class CountingModel(UniformModel):
+    calls = 0
+
+    def predict(self, data):
+        self.calls += 1
+        return super().predict(data)
+
+
+def _ladder(*breakers):
+    board = np.zeros((19, 19), dtype=int)
+    board[[2, 3, 4], [3, 2, 4]] = Location.BLACK
+    board[3, 3] = Location.WHITE
+    target = board == Location.WHITE
+
+    for coord in breakers:
+        board[coord] = Location.WHITE
+
+    return TsumegoBoard(ProblemClass.KILL, target.astype(int), board=board)
+
+
+def test_ladder_is_read():
+    assert read_targets(_ladder()) is True
+    # one breaker still leaves the ladder in the other direction
+    assert read_targets(_ladder((5, 2))) is True
+    assert read_targets(_ladder((5, 2), (1, 5))) is None
+
+
+def test_defender_in_atari():
+    board = np.zeros((19, 19), dtype=int)
+    board[0, :3] = Location.BLACK
+    board[1, :3] = Location.WHITE
+    board[0, 4] = Location.WHITE
+    target = (board == Location.BLACK).astype(int)
+
+    assert read_targets(TsumegoBoard(ProblemClass.LIVE, target, board=board)) is False
+
+    # the white stone next to the liberty is in atari, capturing it saves black
+    board[1, 4] = Location.BLACK
+    board[0, 5] = Location.BLACK
+    assert read_targets(TsumegoBoard(ProblemClass.LIVE, target, board=board)) is None
+
+
+def test_ko_retake_is_not_a_capture():
+    board = np.zeros((19, 19), dtype=int)
+    board[[4, 6, 5, 5], [5, 5, 4, 6]] = Location.BLACK
+    board[[4, 6, 5], [6, 6, 7]] = Location.WHITE
+    target = np.zeros((19, 19), dtype=int)
+    target[5, 5] = 1
+
+    # white takes the ko, black may not retake at once
+    board = TsumegoBoard(ProblemClass.KILL, target, board=board, turn=Location.WHITE)
+    board.move((5, 5))
+    assert board.board[5, 6] == Location.EMPTY
+
+    assert read_targets(board) is None
+
+
+def test_read_leaves_skip_the_model():
+    model = CountingModel()
+    node = Node(_ladder())
+
+    TreeSearch(model).rollout(node, 5)
+
+    assert node.outcome() is True and model.calls == 0 and node.Q == 1
@@ -0,0 +1,51 @@
+import numpy as np
+
+from sgf_solver.board import GoBoard, TsumegoBoard, BOARD_SHAPE
+from sgf_solver.board.tsumego import get_region
+from sgf_solver.enums import Location, ProblemClass
+
+corner_live = np.zeros(BOARD_SHAPE, dtype=int)
+corner_live[[0, 1, 2, 2, 2], [3, 3, 2, 1, 0]] = Location.BLACK
+corner_live[[0, 1, 2, 2, 3, 3, 3, 3], [4, 4, 4, 3, 3, 2, 1, 0]] = Location.WHITE
+
+
+def test_region_snaps_to_corner():
+    region = get_region(corner_live)
+
+    assert region[0, 0] and region[5, 6]
+    assert not region[6, 0] and not region[0, 7]
+
+
+def test_empty_board_region():
+    assert get_region(np.zeros(BOARD_SHAPE)).all()
+
+
+def test_moves_restricted_to_region():
+    board = TsumegoBoard(board=corner_live)
+    moves = board.moves_to_consider()
+
+    assert board.problem == ProblemClass.LIVE
+    assert not moves[~board.region].any()
+    assert moves[0, 0]
+
+
+def test_frame_keeps_problem():
+    board = TsumegoBoard(board=corner_live)
+    framed = board.framed()
+
+    assert np.array_equal(framed.board[board.region], corner_live[board.region])
+    assert (framed.board[~board.region] == Location.WHITE).any()
+    assert (framed.board[~board.region] == Location.BLACK).any()
+    assert framed.problem == ProblemClass.LIVE
+    assert framed.solved() is None
+
+
+def test_legal_moves_plane_covers_whole_board():
+    framed = TsumegoBoard(board=corner_live).framed()
+    searched = TsumegoBoard(board=framed.board, region=framed.region)
+    whole = GoBoard(board=framed.board)
+    for board in (searched, whole):
+        board.move((4, 4))
+
+    assert np.array_equal(searched.legal_moves, whole.legal_moves)
+    assert not searched.legal_moves[10::3, 1::3].any()
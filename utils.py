@@ -1,4 +1,3 @@
-import h5py
 import numpy as np
 from sgf_solver.constants import PROBLEM_DATASET
 
@@ -50,6 +49,8 @@ class ConsoleColor:
 
 
 def get_problems(extended=True):
+    import h5py
+
     return h5py.File(PROBLEM_DATASET.format('big' if extended else 'small'), 'r')
 
 